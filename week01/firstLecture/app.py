@@ -1,3 +1,6 @@
+from collections import defaultdict
+from threading import Lock
+
 from flask import Flask, request
 from flask_restful import Resource, Api
 from werkzeug.exceptions import NotFound
@@ -7,6 +10,8 @@ api = Api(app)
 
 
 class BookModel:
+    __slots__ = ("pk", "title", "author")
+
     def __init__(self, pk, title, author):
         self.pk = pk
         self.title = title
@@ -19,49 +24,129 @@ class BookModel:
         return {"pk": self.pk, "title": self.title, "author": self.author}
 
 
-books = [
-    BookModel(num, f"Title {num}", f"Author {num}")
-    for num in range(1, 6)
-]
+class BookStore:
+    """Books by pk, indexed by author and by the first letters of the title.
+
+    Pks come from a counter and are never reused, even after the newest book is deleted.
+    Books are replaced rather than changed in place, so a reader never sees half an update;
+    single lookups by pk need no lock.
+    """
+    PREFIX_LENGTH = 3
+
+    def __init__(self):
+        self._books = {}
+        self._by_author = defaultdict(dict)
+        self._by_prefix = defaultdict(dict)
+        self._next_pk = 1
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._books)
+
+    def all(self):
+        with self._lock:
+            return list(self._books.values())
+
+    def get(self, pk):
+        return self._books.get(pk)
+
+    def add(self, title, author):
+        with self._lock:
+            book = BookModel(self._next_pk, title, author)
+            self._next_pk += 1
+            self._insert(book)
+        return book
+
+    def update(self, pk, **fields):
+        with self._lock:
+            old = self._books.get(pk)
+            if old is None:
+                return None
+            self._remove(old)
+            book = BookModel(pk, fields.get("title", old.title), fields.get("author", old.author))
+            self._insert(book)
+        return book
+
+    def delete(self, pk):
+        with self._lock:
+            book = self._books.get(pk)
+            if book is not None:
+                self._remove(book)
+        return book
+
+    def by_author(self, author):
+        with self._lock:
+            return [self._books[pk] for pk in self._by_author.get(author, ())]
+
+    def by_title_prefix(self, prefix):
+        prefix = prefix.lower()
+        with self._lock:
+            candidates = [self._books[pk] for pk in self._by_prefix.get(prefix[:self.PREFIX_LENGTH], ())]
+        return [b for b in candidates if b.title.lower().startswith(prefix)]
+
+    def _prefixes(self, title):
+        title = title.lower()
+        return {title[:length] for length in range(1, min(len(title), self.PREFIX_LENGTH) + 1)}
+
+    def _insert(self, book):
+        self._books[book.pk] = book
+        self._by_author[book.author][book.pk] = None
+        for prefix in self._prefixes(book.title):
+            self._by_prefix[prefix][book.pk] = None
+
+    def _remove(self, book):
+        del self._books[book.pk]
+        self._discard(self._by_author, book.author, book.pk)
+        for prefix in self._prefixes(book.title):
+            self._discard(self._by_prefix, prefix, book.pk)
+
+    @staticmethod
+    def _discard(index, key, pk):
+        pks = index[key]
+        pks.pop(pk, None)
+        if not pks:
+            del index[key]
+
+
+books = BookStore()
+for num in range(1, 6):
+    books.add(f"Title {num}", f"Author {num}")
 
 
 class BooksResource(Resource):
     def get(self):
-        return [b.to_dict() for b in books]
+        if "author" in request.args:
+            found = books.by_author(request.args["author"])
+        elif "title" in request.args:
+            found = books.by_title_prefix(request.args["title"])
+        else:
+            found = books.all()
+        return [b.to_dict() for b in found]
 
     def post(self):
-        pk = books[-1].pk
-        pk += 1
         data = request.get_json()
-        book = BookModel(pk, **data)
-        books.append(book)
+        book = books.add(**data)
         return book.to_dict()
 
 
 class BookResource(Resource):
     def get(self, pk):
-        try:
-            book = [b for b in books if b.pk == pk][0]
-            return book.to_dict()
-        except IndexError:
+        book = books.get(pk)
+        if book is None:
             raise NotFound()
+        return book.to_dict()
 
     def put(self, pk):
         data = request.get_json()
-        try:
-            book = [b for b in books if b.pk == pk][0]
-            book.title = data['title']
-            return book.to_dict()
-        except IndexError:
+        book = books.update(pk, title=data['title'])
+        if book is None:
             return {"message": "Book not found"}, 404
+        return book.to_dict()
 
     def delete(self, pk):
-        try:
-            book = [b for b in books if b.pk == pk][0]
-            books.remove(book)
-            return 204
-        except IndexError:
+        if books.delete(pk) is None:
             return {"message": "Book not found"}, 404
+        return 204
 
 
 api.add_resource(BooksResource, "/books")
@@ -0,0 +1,46 @@
+"""Lookup and update cost of the in-memory BookStore as it grows.
+
+    python benchmark.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import random
+import string
+import time
+
+from app import BookStore
+
+
+def random_title():
+    return "".join(random.choices(string.ascii_lowercase, k=12))
+
+
+def ns_per_op(func, keys):
+    start = time.perf_counter_ns()
+    for key in keys:
+        func(key)
+    return (time.perf_counter_ns() - start) / len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--ops", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'books':>10} {'get ns':>8} {'update ns':>10} {'author ns':>10} {'prefix ns':>10}")
+    for size in args.sizes:
+        store = BookStore()
+        # About ten books per author and random titles, so index buckets stay the same size as the store grows
+        authors = max(size // 10, 1)
+        for i in range(size):
+            store.add(random_title(), f"Author {i % authors}")
+        keys = [random.randint(1, size) for _ in range(args.ops)]
+        get = ns_per_op(store.get, keys)
+        update = ns_per_op(lambda pk: store.update(pk, title=random_title()), keys)
+        by_author = ns_per_op(store.by_author, [f"Author {k % authors}" for k in keys[:10_000]])
+        by_prefix = ns_per_op(store.by_title_prefix, [store.get(k).title[:5] for k in keys[:10_000]])
+        print(f"{size:>10,} {get:>8.0f} {update:>10.0f} {by_author:>10.0f} {by_prefix:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ from flask_restful import Resource, Api
 from flask_migrate import Migrate
 from sqlalchemy import Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase
-from werkzeug.exceptions import NotFound
+from werkzeug.exceptions import BadRequest, NotFound
 
 app = Flask(__name__)
 
@@ -35,45 +35,96 @@ class BookModel(db.Model):
         return {"id": self.id, "title": self.title, "author": self.author}
 
 
+def validate_books(data, fields):
+    """Return the body as a non-empty list of books holding only ``fields``, or raise 400."""
+    if not isinstance(data, list) or not data:
+        raise BadRequest("Expected a non-empty list of books.")
+    books = []
+    for index, book in enumerate(data):
+        if not isinstance(book, dict):
+            raise BadRequest(f"Book {index} must be an object.")
+        invalid = [name for name, kind in fields.items()
+                   if not isinstance(book.get(name), kind) or isinstance(book.get(name), bool)]
+        if invalid:
+            raise BadRequest(f"Book {index} needs a valid {', '.join(invalid)}.")
+        books.append({name: book[name] for name in fields})
+    return books
+
+
 class BooksResource(Resource):
     def get(self):
         books = db.session.execute(db.select(BookModel)).scalars()
         return [b.as_dict() for b in books]
 
     def post(self):
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if isinstance(data, list):
+            data = validate_books(data, {"title": str, "author": str})
+            # One multi-row INSERT ... RETURNING for the whole batch
+            books = db.session.execute(db.insert(BookModel).returning(BookModel), data).scalars().all()
+            db.session.commit()
+            return [b.as_dict() for b in books], 201
+        data, = validate_books([data], {"title": str, "author": str})
         new_book = BookModel(**data)
         db.session.add(new_book)
         db.session.commit()
         return new_book.as_dict(), 201
 
+    def put(self):
+        data = validate_books(request.get_json(silent=True), {"id": int, "title": str})
+        ids = [book["id"] for book in data]
+        found = set(db.session.execute(
+            db.select(BookModel.id).where(BookModel.id.in_(ids)).with_for_update()
+        ).scalars())
+        missing = [i for i in ids if i not in found]
+        if missing:
+            db.session.rollback()
+            return {"message": "Books not found", "ids": missing}, 404
+        db.session.execute(db.update(BookModel), [{"id": book["id"], "title": book["title"]} for book in data])
+        db.session.commit()
+        return {"message": f"{len(ids)} books are updated."}
+
+    def delete(self):
+        data = request.get_json(silent=True)
+        ids = data.get("ids") if isinstance(data, dict) else None
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise BadRequest("Expected a non-empty list of book ids in 'ids'.")
+        deleted = set(db.session.execute(
+            db.delete(BookModel).where(BookModel.id.in_(ids)).returning(BookModel.id)
+        ).scalars())
+        missing = [i for i in ids if i not in deleted]
+        if missing:
+            db.session.rollback()
+            return {"message": "Books not found", "ids": missing}, 404
+        db.session.commit()
+        return {"message": f"{len(deleted)} books are deleted."}
+
 
 class BookResource(Resource):
     def get(self, id):
-        try:
-            book = db.session.execute(db.select(BookModel).filter_by(id=id)).scalar_one()
-            return book.as_dict()
-        except IndexError:
+        book = db.session.get(BookModel, id)
+        if book is None:
             raise NotFound()
+        return book.as_dict()
 
     def put(self, id):
-        data = request.get_json()
-        try:
-            book = db.session.execute(db.select(BookModel).filter_by(id=id)).scalar_one()
-            book.title = data['title']
-            db.session.commit()
-            return {"message": f"Book with id {id} is updated."}
-        except IndexError:
+        data, = validate_books([request.get_json(silent=True)], {"title": str})
+        updated = db.session.execute(
+            db.update(BookModel).where(BookModel.id == id).values(title=data['title']).returning(BookModel.id)
+        ).scalar()
+        if updated is None:
             return {"message": "Book not found"}, 404
+        db.session.commit()
+        return {"message": f"Book with id {id} is updated."}
 
     def delete(self, id):
-        try:
-            book = db.session.execute(db.select(BookModel).filter_by(id=id)).scalar_one()
-            db.session.delete(book)
-            db.session.commit()
-            return {"message": f"Book with id {id} is deleted."}
-        except IndexError:
+        deleted = db.session.execute(
+            db.delete(BookModel).where(BookModel.id == id).returning(BookModel.id)
+        ).scalar()
+        if deleted is None:
             return {"message": "Book not found"}, 404
+        db.session.commit()
+        return {"message": f"Book with id {id} is deleted."}
 
 
 api.add_resource(BooksResource, '/books')
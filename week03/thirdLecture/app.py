@@ -1,18 +1,22 @@
 import enum
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from threading import Lock
 
 import jwt
-from decouple import config
+from decouple import Csv, config
 from flask import Flask, request
 from flask_httpauth import HTTPTokenAuth
 from flask_migrate import Migrate
 from flask_restful import Api, Resource, abort
 from flask_sqlalchemy import SQLAlchemy
-from marshmallow import Schema, fields, ValidationError, validates
+from marshmallow import Schema, fields, ValidationError, validates, validate
 from password_strength import PasswordPolicy
-from sqlalchemy import func
+from sqlalchemy import event, func
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, object_session
 from werkzeug.exceptions import Forbidden
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -31,9 +35,50 @@ app.config['SQLALCHEMY_DATABASE_URI'] = \
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
+SECRET_KEY = config("SECRET_KEY")
+# JWT_SIGNING_KEYS is a list of kid:secret pairs. The first signs new tokens and the rest only
+# verify, so a key is rotated out by putting a new one first and dropping the old one once its
+# tokens have expired. Tokens without a kid header are checked against the "default" key.
+SIGNING_KEYS = dict(pair.split(":", 1) for pair in config("JWT_SIGNING_KEYS", default="", cast=Csv())) \
+    or {"default": SECRET_KEY}
+ACTIVE_KID = next(iter(SIGNING_KEYS))
+
 auth = HTTPTokenAuth(scheme="Bearer")
 
 
+class VerifiedTokens:
+    """Bounded memo of token digest -> (user id, exp) for tokens whose signature already checked out.
+
+    A repeat request with the same token skips ``jwt.decode`` and only loads the user.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._tokens = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._tokens.get(digest)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._tokens[digest]
+                return None
+            self._tokens.move_to_end(digest)
+            return entry[0]
+
+    def set(self, digest, user_id, exp):
+        with self._lock:
+            self._tokens[digest] = (user_id, exp)
+            self._tokens.move_to_end(digest)
+            while len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last=False)
+
+
+verified_tokens = VerifiedTokens()
+
+
 @auth.verify_token
 def verify_token(token):
     try:
@@ -75,18 +120,23 @@ class User(db.Model):
     )
 
     def encode_token(self):
-        key = config("SECRET_KEY")
         data = {
             "exp": datetime.utcnow() + timedelta(days=2),
             "sub": self.id
         }
-        return jwt.encode(data, key, algorithm="HS256")
+        return jwt.encode(data, SIGNING_KEYS[ACTIVE_KID], algorithm="HS256", headers={"kid": ACTIVE_KID})
 
     @staticmethod
     def decode_token(token):
-        key = config("SECRET_KEY")
-        data = jwt.decode(token, key, algorithms=["HS256"])
-        user_id = data["sub"]
+        digest = hashlib.sha256(token.encode()).digest()
+        user_id = verified_tokens.get(digest)
+        if user_id is None:
+            key = SIGNING_KEYS.get(jwt.get_unverified_header(token).get("kid", "default"))
+            if key is None:
+                raise jwt.exceptions.InvalidTokenError()
+            data = jwt.decode(token, key, algorithms=["HS256"])
+            user_id = data["sub"]
+            verified_tokens.set(digest, user_id, data["exp"])
         user = db.session.execute(db.select(User).filter_by(id=user_id)).scalar()
         if not user:
             raise jwt.exceptions.InvalidTokenError()
@@ -128,6 +178,80 @@ class Clothes(db.Model):
     created_on: Mapped[datetime] = mapped_column(server_default=func.now())
     updated_on: Mapped[datetime] = mapped_column(onupdate=func.now(), server_default=func.now())
 
+    # Serve color (and color + size) filters, size-only filters, and the id-ordered pages within them
+    __table_args__ = (
+        db.Index("ix_clothes_color_size_id", "color", "size", "id"),
+        db.Index("ix_clothes_size_id", "size", "id"),
+    )
+
+
+class CatalogCache:
+    """In-process cache of catalog pages, keyed by a version that every committed Clothes write bumps.
+
+    The version is read before the page is queried, so a page built from data that a
+    concurrent write has since replaced is stored under an old version and never served.
+    Writes made by other processes or tools never bump it, so pages also expire after
+    ``ttl`` seconds; that bounds how stale they can get.
+    """
+
+    def __init__(self, maxsize=512, ttl=30):
+        self.version = 0
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._pages = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is None:
+                return None
+            page, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._pages[key]
+                return None
+            self._pages.move_to_end(key)
+            return page
+
+    def set(self, key, page):
+        with self._lock:
+            self._pages[key] = (page, time.monotonic() + self.ttl)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.maxsize:
+                self._pages.popitem(last=False)
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+            self._pages.clear()
+
+
+catalog_cache = CatalogCache(ttl=config("CATALOG_CACHE_TTL", default=30, cast=int))
+
+
+@event.listens_for(Clothes, "after_insert")
+@event.listens_for(Clothes, "after_update")
+@event.listens_for(Clothes, "after_delete")
+def _clothes_written(mapper, connection, target):
+    object_session(target).info["clothes_changed"] = True
+
+
+@event.listens_for(db.session, "do_orm_execute")
+def _clothes_bulk_written(orm_execute_state):
+    if not orm_execute_state.is_select and orm_execute_state.bind_mapper is Clothes.__mapper__:
+        orm_execute_state.session.info["clothes_changed"] = True
+
+
+@event.listens_for(db.session, "after_commit")
+def _clothes_committed(session):
+    if session.info.pop("clothes_changed", False):
+        catalog_cache.bump()
+
+
+@event.listens_for(db.session, "after_rollback")
+def _clothes_rolled_back(session):
+    session.info.pop("clothes_changed", None)
+
 
 class BaseUserSchema(Schema):
     email = fields.Email(required=True)
@@ -185,6 +309,32 @@ class ClothesResponseSchema(Schema):
                                   "and not more than 255 characters long.")
 
 
+class ClothesQuerySchema(Schema):
+    color = fields.Enum(ColorEnum)
+    size = fields.Enum(SizeEnum)
+    limit = fields.Integer(load_default=20, validate=validate.Range(min=1, max=100))
+    after = fields.Integer()
+
+
+def clothes_facets(color=None, size=None):
+    """Counts per color and per size from one grouped query.
+
+    Each facet is narrowed by the other filter but not by its own, so every count is the
+    number of results the user would get by picking that value.
+    """
+    rows = db.session.execute(
+        db.select(Clothes.color, Clothes.size, func.count()).group_by(Clothes.color, Clothes.size)
+    ).all()
+    colors = {c.name: 0 for c in ColorEnum}
+    sizes = {s.name: 0 for s in SizeEnum}
+    for row_color, row_size, count in rows:
+        if size is None or row_size == size:
+            colors[row_color.name] += count
+        if color is None or row_color == color:
+            sizes[row_size.name] += count
+    return {"color": colors, "size": sizes}
+
+
 class SignUpResource(Resource):
     def post(self):
         data = request.get_json()
@@ -232,9 +382,31 @@ class ClothesResource(Resource):
     @auth.login_required
     @permissions_required([UserRolesEnum.user, UserRolesEnum.admin])
     def get(self):
-        clothes = db.session.execute(db.select(Clothes)).scalars()
-        resp = ClothesResponseSchema().dump(clothes, many=True)
-        return {"data": resp}, 200
+        try:
+            args = ClothesQuerySchema().load(request.args)
+        except ValidationError as ex:
+            return ex.messages, 400
+
+        version = catalog_cache.version
+        key = (version, args.get("color"), args.get("size"), args["limit"], args.get("after"))
+        page = catalog_cache.get(key)
+        if page is None:
+            query = db.select(Clothes)
+            if "color" in args:
+                query = query.filter_by(color=args["color"])
+            if "size" in args:
+                query = query.filter_by(size=args["size"])
+            if "after" in args:
+                query = query.where(Clothes.id > args["after"])
+            clothes = db.session.execute(query.order_by(Clothes.id).limit(args["limit"] + 1)).scalars().all()
+            next_after = clothes[args["limit"] - 1].id if len(clothes) > args["limit"] else None
+            page = {
+                "data": ClothesResponseSchema().dump(clothes[:args["limit"]], many=True),
+                "next_after": next_after,
+                "facets": clothes_facets(args.get("color"), args.get("size")),
+            }
+            catalog_cache.set(key, page)
+        return page, 200
 
 
 api.add_resource(SignUpResource, '/register')
@@ -1,25 +1,53 @@
 from decouple import config
-from flask import Flask
+from flask import Flask, g
 from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_restful import Api
 
-from db import db
+from commands.data_import import import_data
+from commands.query_plans import check_query_plans
+from commands.replicas import check_replica_routing
+from commands.tokens import prune_tokens
+from db import db, finish_session, include_object, stick_after_write
+from managers.auth import principal_cache, token_memo
 from resources.routes import routes
+from services.hashing import password_hasher
+from services.metrics import request_metrics
+from services.replicas import replica_router
+from services.revocation import session_revocations
+from services.signing import signing_keys
+from services.slow_queries import slow_query_log
 
 environment = config("CONFIG_ENV")
 app = Flask(__name__)
 app.config.from_object(environment)
 db.init_app(app)
+replica_router.init_app(app)
+signing_keys.init_app(app)
+token_memo.init_app(app)
+session_revocations.init_app(app)
+principal_cache.init_app(app)
+password_hasher.init_app(app)
+request_metrics.init_app(app)
+slow_query_log.init_app(app)
 api = Api(app)
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, include_object=include_object)
 CORS(app)
+app.cli.add_command(check_query_plans)
+app.cli.add_command(import_data)
+app.cli.add_command(check_replica_routing)
+app.cli.add_command(prune_tokens)
 
 
-@app.teardown_appcontext
-def close_request(response):
-    db.session.commit()
-    return response
+@app.after_request
+def remember_status(response):
+    g.response_status = response.status_code
+    return stick_after_write(response)
+
+
+@app.teardown_request
+def close_request(exception):
+    finish_session(exception)
 
 
 [api.add_resource(*route) for route in routes]
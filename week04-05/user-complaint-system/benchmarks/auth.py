@@ -0,0 +1,60 @@
+"""Cost of verifying a bearer token, before and after the signing-key cache and token memo.
+
+Compares the old path (re-reading ``SECRET_KEY`` through decouple on every call, then
+``jwt.decode``), a cold decode with the cached key, and a memoized repeat of the same token:
+
+    python -m benchmarks.auth --iterations 20000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import jwt
+import pytz
+from decouple import config
+
+from app import app
+from managers.auth import AuthManager, token_memo
+from services.signing import signing_keys
+
+
+def per_call(function, token, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function(token)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def uncached_decode(token):
+    return jwt.decode(jwt=token, key=config("SECRET_KEY"), algorithms=["HS256"])
+
+
+def memo_miss_decode(token):
+    token_memo.clear()
+    return AuthManager.decode_token(token)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    payload = {"sub": 1, "sid": "benchmark", "exp": datetime.now(pytz.utc) + timedelta(hours=1), "role": "complainer"}
+    with app.app_context():
+        # A token without a kid header verifies against the default key either way
+        legacy_token = jwt.encode(payload, key=config("SECRET_KEY"), algorithm="HS256")
+        token = signing_keys.encode(payload)
+
+        results = [
+            ("config() + jwt.decode", per_call(uncached_decode, legacy_token, args.iterations)),
+            ("cached key, signing_keys.decode", per_call(signing_keys.decode, token, args.iterations)),
+            ("AuthManager.decode_token, memo miss", per_call(memo_miss_decode, token, args.iterations)),
+            ("AuthManager.decode_token, memo hit", per_call(AuthManager.decode_token, token, args.iterations)),
+        ]
+    baseline = results[0][1]
+    for name, micros in results:
+        print(f"{name:<38} {micros:>8.2f} us/call ({baseline / micros:>5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
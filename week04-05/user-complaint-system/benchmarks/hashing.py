@@ -0,0 +1,44 @@
+"""Password hashing throughput at different cost settings.
+
+    python -m benchmarks.hashing --count 20 --workers 0 4 --methods pbkdf2:sha256:100000 pbkdf2:sha256:600000
+"""
+import argparse
+import time
+
+from flask import Flask
+
+from services.hashing import PasswordHasher
+
+
+def run(method, workers, count):
+    app = Flask(__name__)
+    app.config.update(PASSWORD_HASH_METHOD=method, PASSWORD_HASH_WORKERS=workers,
+                      PASSWORD_HASH_MAX_PENDING=count)
+    hasher = PasswordHasher()
+    hasher.init_app(app)
+    try:
+        hasher.hash("warm-up")
+        start = time.perf_counter()
+        hasher.hash_many(f"password-{i}" for i in range(count))
+        elapsed = time.perf_counter() - start
+    finally:
+        hasher.shutdown()
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--methods", nargs="+",
+                        default=["pbkdf2:sha256:100000", "pbkdf2:sha256:600000", "scrypt:32768:8:1"])
+    args = parser.parse_args()
+
+    print(f"{'method':<24} {'workers':>7} {'hashes/sec':>11}")
+    for method in args.methods:
+        for workers in args.workers:
+            print(f"{method:<24} {workers:>7} {run(method, workers, args.count):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
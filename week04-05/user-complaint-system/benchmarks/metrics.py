@@ -0,0 +1,58 @@
+"""Request overhead of the per-route metrics, measured with the hooks on and off.
+
+Drives the complaints listing through the test client against the configured database,
+alternating rounds with metrics enabled and disabled:
+
+    python -m benchmarks.metrics --requests 2000
+"""
+import argparse
+import statistics
+import time
+import uuid
+
+from app import app
+from services.metrics import request_metrics
+
+
+def time_requests(client, headers, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        response = client.get("/complainers/complaints", headers=headers)
+        if response.status_code != 200:
+            raise SystemExit(f"Listing returned {response.status_code}: {response.json}")
+    return (time.perf_counter() - start) / count * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--complaints", type=int, default=20)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    response = client.post("/register", json={
+        "email": f"bench-metrics-{uuid.uuid4().hex[:8]}@example.com", "password": "bench",
+        "first_name": "Bench", "last_name": "Metrics", "phone": "0888888888",
+    })
+    headers = {"Authorization": f"Bearer {response.json['token']}"}
+    for i in range(args.complaints):
+        client.post("/complainers/complaints", headers=headers,
+                    json={"title": f"Complaint {i}", "description": "Broken", "photo_url": "https://img/1.jpg",
+                          "amount": i})
+
+    time_requests(client, headers, args.requests // 10)
+    timings = {True: [], False: []}
+    for _ in range(args.rounds):
+        for enabled in (False, True):
+            request_metrics.enabled = enabled
+            timings[enabled].append(time_requests(client, headers, args.requests))
+    request_metrics.enabled = True
+
+    off, on = statistics.median(timings[False]), statistics.median(timings[True])
+    print(f"metrics off: {off:>8.1f} us/request")
+    print(f"metrics on:  {on:>8.1f} us/request ({on - off:+.1f} us, {(on - off) / off:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
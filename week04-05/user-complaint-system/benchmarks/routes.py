@@ -0,0 +1,343 @@
+"""Latency and throughput of every API route, with a baseline comparison.
+
+Seeds users and complaints into the configured database, then drives each route in
+resources/routes.py either in-process through the Flask test client or, with --url,
+over HTTP from several threads against a running server that uses the same database.
+Point CONFIG_ENV at a freshly migrated scratch database so runs see the same volumes:
+
+    python -m benchmarks.routes --complaints 20000 --requests 300 --save before.json
+    python -m benchmarks.routes --complaints 20000 --requests 300 --baseline before.json
+    python -m benchmarks.routes --url http://127.0.0.1:5000 --threads 8 --baseline before-http.json
+
+A route is flagged as a regression when its p95 latency rises, or its throughput falls,
+by more than --threshold against the baseline; the exit status is then 1.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import queue
+import statistics
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from app import app
+from benchmarks.search import WORDS
+from db import db
+from models import ComplaintModel, RoleType, State, UserModel
+from services.hashing import password_hasher
+from services.search import fallback_search_index
+
+PASSWORD = "bench-password"
+
+
+class Context:
+    """Tokens, seeded ids and unique-value counters shared by the scenarios of one run."""
+
+    def __init__(self, tag, complaint_ids):
+        self.tag = tag
+        self.complainer_email = f"bench-{tag}-complainer-0@example.com"
+        self.tokens = {}
+        # One rotating refresh token per client thread: presenting a rotated one ends the session
+        self.refresh_tokens = queue.SimpleQueue()
+        self._counter = itertools.count()
+        self._complaint_ids = iter(complaint_ids)
+        self._lock = threading.Lock()
+
+    def unique(self):
+        with self._lock:
+            return next(self._counter)
+
+    def complaint_ids(self, count=1):
+        with self._lock:
+            return list(itertools.islice(self._complaint_ids, count))
+
+    def email(self, kind):
+        return f"bench-{self.tag}-{kind}-{self.unique()}@example.com"
+
+
+class Scenario:
+    def __init__(self, name, method, path, role=None, body=None, content_type="application/json", allow=(),
+                 after=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.role = role
+        self.body = body
+        self.content_type = content_type
+        # Statuses that are not errors for this route even though they are >= 400
+        self.allow = set(allow)
+        # Called with the context and response body of each successful request
+        self.after = after
+
+    def request(self, context):
+        path = self.path(context) if callable(self.path) else self.path
+        body = self.body(context) if callable(self.body) else self.body
+        if body is not None and self.content_type == "application/json":
+            body = json.dumps(body)
+        headers = {"Content-Type": self.content_type}
+        if self.role is not None:
+            headers["Authorization"] = f"Bearer {context.tokens[self.role]}"
+        return self.method, path, headers, body
+
+
+def _staff_user(context):
+    return {"email": context.email("staff"), "password": PASSWORD, "first_name": "Bench", "last_name": "Staff",
+            "phone": "0888888888", "role": "approver", "certificate": "https://example.com/certificate.pdf"}
+
+
+def _password_change(context):
+    # Alternates between two passwords; concurrent HTTP runs can race and get a 404, or a 401
+    # when another thread's change has just revoked the session of the token in use
+    old, new = (PASSWORD, "bench-password-2") if context.unique() % 2 == 0 else ("bench-password-2", PASSWORD)
+    return {"old_password": old, "new_password": new}
+
+
+def _password_changed(context, data):
+    context.tokens["password"] = data["token"]
+
+
+def _refreshed(context, data):
+    context.refresh_tokens.put(data["refresh_token"])
+
+
+def _complaint(context):
+    return {"title": "Water leak", "description": "Water is leaking through the ceiling",
+            "photo_url": "https://example.com/photo.jpg", "amount": 10}
+
+
+def _import_rows(context):
+    return "\n".join(json.dumps(_staff_user(context)) for _ in range(10))
+
+
+SCENARIOS = [
+    Scenario("register", "POST", "/register", body=lambda c: {
+        "email": c.email("register"), "password": PASSWORD, "first_name": "Bench", "last_name": "User",
+        "phone": "0888888888"}),
+    Scenario("login", "POST", "/login", body=lambda c: {"email": c.complainer_email, "password": PASSWORD}),
+    Scenario("refresh token", "POST", "/token/refresh", body=lambda c: {"refresh_token": c.refresh_tokens.get()},
+             after=_refreshed),
+    Scenario("list (complainer)", "GET", "/complainers/complaints?limit=20", role="complainer"),
+    Scenario("list (approver)", "GET", "/complainers/complaints?limit=20", role="approver"),
+    Scenario("list (approver, include=complainer)", "GET", "/complainers/complaints?limit=20&include=complainer",
+             role="approver"),
+    Scenario("create complaint", "POST", "/complainers/complaints", role="complainer", body=_complaint),
+    Scenario("approve", "PUT", lambda c: f"/complaints/{c.complaint_ids()[0]}/approve", role="approver"),
+    Scenario("reject", "PUT", lambda c: f"/complaints/{c.complaint_ids()[0]}/reject", role="approver"),
+    Scenario("bulk status", "PUT", "/complaints/bulk-status", role="approver",
+             body=lambda c: {"ids": c.complaint_ids(10), "status": State.approved.value}),
+    Scenario("claim", "POST", "/complaints/claim", role="approver", body={"limit": 10}),
+    Scenario("search", "GET", "/complaints/search?q=water+leak", role="approver"),
+    Scenario("export", "GET", "/complaints/export?status=Rejected", role="approver"),
+    Scenario("create staff user", "POST", "/admin/users", role="admin", body=_staff_user),
+    Scenario("change password", "POST", "/users/change-password", role="password", body=_password_change,
+             allow={401, 404}, after=_password_changed),
+    Scenario("db pool", "GET", "/admin/db-pool", role="admin"),
+    Scenario("import users", "POST", "/admin/import/users", role="admin", body=_import_rows,
+             content_type="application/x-ndjson"),
+    Scenario("slow queries", "GET", "/admin/slow-queries", role="admin"),
+    Scenario("clear slow queries", "DELETE", "/admin/slow-queries", role="admin"),
+    Scenario("metrics", "GET", "/metrics", role="admin"),
+]
+
+
+def seed(tag, complainers, complaints):
+    """Insert the users and complaints for one run; returns the seeded complaint ids."""
+    pwhash = password_hasher.hash(PASSWORD)
+
+    def user(kind, role, **extra):
+        return {"email": f"bench-{tag}-{kind}@example.com", "password": pwhash, "first_name": "Bench",
+                "last_name": kind.title(), "phone": "0888888888", "role": role, **extra}
+
+    users = [user("admin", RoleType.admin), user("password", RoleType.complainer),
+             user("approver", RoleType.approver, certificate="https://example.com/certificate.pdf")]
+    users += [user(f"complainer-{i}", RoleType.complainer) for i in range(complainers)]
+    db.session.execute(db.insert(UserModel.__table__), users)
+    complainer_ids = db.session.execute(
+        db.select(UserModel.id).where(UserModel.email.like(f"bench-{tag}-complainer-%")).order_by(UserModel.id)
+    ).scalars().all()
+
+    for start in range(0, complaints, 5000):
+        db.session.execute(db.insert(ComplaintModel.__table__), [{
+            "title": f"{WORDS[i % 30]} {WORDS[i // 30 % 30]}",
+            "description": f"The {WORDS[i * 7 % 30]} and the {WORDS[i * 13 % 30]} near flat {i}",
+            "photo_url": f"https://example.com/{i}.jpg",
+            "amount": i % 500,
+            "status": State.pending,
+            "complainer_id": complainer_ids[i % len(complainer_ids)],
+        } for i in range(start, min(start + 5000, complaints))])
+    complaint_ids = db.session.execute(
+        db.select(ComplaintModel.id).where(ComplaintModel.complainer_id.in_(complainer_ids)).order_by(ComplaintModel.id)
+    ).scalars().all()
+    db.session.commit()
+    fallback_search_index.invalidate()
+    return complaint_ids
+
+
+class TestClientDriver:
+    threads = 1
+
+    def __init__(self):
+        self._client = app.test_client()
+
+    def send(self, method, path, headers, body):
+        response = self._client.open(path, method=method, headers=headers, data=body)
+        response.get_data()
+        return response.status_code, response.get_json(silent=True)
+
+
+class HTTPDriver:
+    def __init__(self, url, threads):
+        parts = urlsplit(url)
+        self.host, self.port, self.threads = parts.hostname, parts.port or 80, threads
+        self._local = threading.local()
+
+    def send(self, method, path, headers, body):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            self._local.connection = None
+            raise
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, None
+
+
+def login(driver, email):
+    status, data = driver.send("POST", "/login", {"Content-Type": "application/json"},
+                               json.dumps({"email": email, "password": PASSWORD}))
+    if status != 200:
+        raise SystemExit(f"Could not log in as {email}: {status} {data}")
+    return data
+
+
+def run_scenario(driver, scenario, context, requests):
+    latencies, errors = [], []
+    remaining = itertools.count()
+    lock = threading.Lock()
+
+    def worker():
+        while next(remaining) < requests:
+            method, path, headers, body = scenario.request(context)
+            start = time.perf_counter()
+            try:
+                status, data = driver.send(method, path, headers, body)
+            except (http.client.HTTPException, OSError) as ex:
+                status = type(ex).__name__
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if not isinstance(status, int) or (status >= 400 and status not in scenario.allow):
+                    errors.append(status)
+            if scenario.after is not None and isinstance(status, int) and status < 400:
+                scenario.after(context, data)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(driver.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_statuses": sorted({str(status) for status in errors}),
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "throughput_rps": len(latencies) / wall,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Names of the scenarios whose p95 or throughput moved the wrong way by more than threshold."""
+    regressions = {}
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        reasons = []
+        if result["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            reasons.append(f"p95 {before['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms")
+        if result["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            reasons.append(f"throughput {before['throughput_rps']:.0f} -> {result['throughput_rps']:.0f} req/s")
+        if reasons:
+            regressions[name] = reasons
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--complainers", type=int, default=200)
+    parser.add_argument("--complaints", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route.")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per route.")
+    parser.add_argument("--url", help="Benchmark a running server over HTTP instead of the test client.")
+    parser.add_argument("--threads", type=int, default=4, help="Client threads in --url mode.")
+    parser.add_argument("--only", nargs="+", metavar="ROUTE", help="Only run these scenarios.")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as JSON, e.g. to use as a baseline.")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against results saved with --save.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown (default 0.10).")
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.only or s.name in args.only]
+    # Routes that use up pending complaints need one per request, bulk status ten
+    needed = sum((args.requests + args.warmup) * (10 if s.name == "bulk status" else 1)
+                 for s in scenarios if s.name in {"approve", "reject", "bulk status"})
+    tag = uuid.uuid4().hex[:8]
+    with app.app_context():
+        start = time.perf_counter()
+        complaint_ids = seed(tag, args.complainers, max(args.complaints, needed))
+        print(f"seeded {args.complainers:,} complainers and {len(complaint_ids):,} complaints "
+              f"in {time.perf_counter() - start:.1f}s")
+
+    driver = HTTPDriver(args.url, args.threads) if args.url else TestClientDriver()
+    context = Context(tag, complaint_ids)
+    for role, kind in (("admin", "admin"), ("approver", "approver"), ("complainer", "complainer-0"),
+                       ("password", "password")):
+        context.tokens[role] = login(driver, f"bench-{tag}-{kind}@example.com")["token"]
+    for _ in range(driver.threads):
+        context.refresh_tokens.put(login(driver, context.complainer_email)["refresh_token"])
+
+    results = {}
+    print(f"{'route':<38} {'reqs':>6} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for scenario in scenarios:
+        if args.warmup:
+            run_scenario(driver, scenario, context, args.warmup)
+        result = results[scenario.name] = run_scenario(driver, scenario, context, args.requests)
+        print(f"{scenario.name:<38} {result['requests']:>6} {result['errors']:>6} {result['p50_ms']:>8.2f} "
+              f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['throughput_rps']:>8.0f}"
+              + (f"  errors: {', '.join(result['error_statuses'])}" if result["errors"] else ""))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"mode": "http" if args.url else "test-client", "results": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mode = "http" if args.url else "test-client"
+        if baseline["mode"] != mode:
+            print(f"warning: baseline was recorded in {baseline['mode']} mode, this run used {mode}")
+        regressions = compare(results, baseline["results"], args.threshold)
+        for name, reasons in regressions.items():
+            print(f"REGRESSION {name}: {'; '.join(reasons)}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
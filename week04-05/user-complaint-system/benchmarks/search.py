@@ -0,0 +1,88 @@
+"""Full-text search latency on a large COMPLAINTS table.
+
+Seeds --rows synthetic complaints into the configured database, so point CONFIG_ENV
+at a scratch PostgreSQL database that has been migrated:
+
+    python -m benchmarks.search --rows 1000000 --queries "water leak" "broken window"
+"""
+import argparse
+import statistics
+import time
+from types import SimpleNamespace
+
+from app import app
+from db import db
+from managers.complainer import ComplainerManager
+from models import RoleType, UserModel
+
+WORDS = [
+    "water", "leak", "broken", "window", "heating", "noise", "neighbour", "elevator", "parking", "garbage",
+    "door", "lock", "mould", "roof", "light", "stairs", "pipe", "boiler", "internet", "power",
+    "smell", "pest", "rats", "cracked", "wall", "floor", "ceiling", "damp", "cold", "hot",
+]
+
+SEED_SQL = """
+INSERT INTO "COMPLAINTS" (title, description, photo_url, amount, status, complainer_id)
+SELECT w[1 + i % 30] || ' ' || w[1 + (i / 30) % 30],
+       'The ' || w[1 + (i * 7) % 30] || ' and the ' || w[1 + (i * 13) % 30] || ' near flat ' || i,
+       'https://example.com/' || i || '.jpg', i % 500, 'pending', :complainer_id
+FROM generate_series(1, :rows) AS i, (SELECT CAST(:words AS text[]) AS w) AS words
+"""
+
+
+def seed(rows):
+    user = db.session.execute(db.select(UserModel).filter_by(email="bench-search@example.com")).scalar()
+    if user is None:
+        user = UserModel(email="bench-search@example.com", password="-", first_name="Bench", last_name="Search",
+                         role=RoleType.complainer)
+        db.session.add(user)
+        db.session.flush()
+    db.session.execute(db.text(SEED_SQL), {"rows": rows, "complainer_id": user.id, "words": WORDS})
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE "COMPLAINTS"'))
+    db.session.commit()
+
+
+def time_search(user, filters, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ComplainerManager.search(user, dict(filters))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--queries", nargs="+", default=["water", "broken window", "mould damp ceiling"])
+    args = parser.parse_args()
+
+    with app.app_context():
+        if not args.skip_seed:
+            start = time.perf_counter()
+            seed(args.rows)
+            print(f"seeded {args.rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+        approver = SimpleNamespace(id=0, role=RoleType.approver)
+        print(f"{'query':<24} {'page':>5} {'p50 ms':>8} {'p95 ms':>8}")
+        for q in args.queries:
+            for page in (1, 2, 10):
+                filters = {"q": q, "limit": args.limit}
+                for _ in range(page - 1):
+                    _, cursor = ComplainerManager.search(approver, dict(filters))
+                    if cursor is None:
+                        break
+                    filters["cursor"] = cursor
+                else:
+                    timings = time_search(approver, filters, args.repeat)
+                    p95 = statistics.quantiles(timings, n=20)[-1]
+                    print(f"{q:<24} {page:>5} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+                db.session.rollback()
+
+
+if __name__ == "__main__":
+    main()
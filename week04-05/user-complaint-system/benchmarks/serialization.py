@@ -0,0 +1,53 @@
+"""Compiled complaint serializer against marshmallow, with an output equality check.
+
+    python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from models import ComplaintModel, State
+from schemas.response.complaint import ResponseComplaintSchema, complaint_serializer
+
+
+def make_complaints(count):
+    start = datetime(2024, 1, 1)
+    states = list(State)
+    return [
+        ComplaintModel(id=i, title=f"Complaint {i}", description="Broken " * 10, photo_url=f"https://img/{i}.jpg",
+                       amount=i * 1.5, created_on=start + timedelta(seconds=i), status=states[i % len(states)],
+                       complainer_id=i % 100)
+        for i in range(count)
+    ]
+
+
+def rows_per_second(dump, complaints, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        dump(complaints)
+        best = min(best, time.perf_counter() - start)
+    return len(complaints) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    complaints = make_complaints(args.rows)
+    expected = json.dumps(ResponseComplaintSchema().dump(complaints, many=True))
+    actual = json.dumps(complaint_serializer.dump(complaints, many=True))
+    if actual != expected:
+        raise SystemExit("Compiled serializer output differs from marshmallow")
+
+    marshmallow_rate = rows_per_second(lambda c: ResponseComplaintSchema().dump(c, many=True), complaints, args.repeat)
+    compiled_rate = rows_per_second(lambda c: complaint_serializer.dump(c, many=True), complaints, args.repeat)
+    print(f"marshmallow: {marshmallow_rate:>12,.0f} rows/sec")
+    print(f"compiled:    {compiled_rate:>12,.0f} rows/sec ({compiled_rate / marshmallow_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import json
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from db import db
+from managers.importer import IMPORTERS, ImportManager, read_records
+
+
+@click.command("import-data")
+@click.argument("kind", type=click.Choice(sorted(IMPORTERS)))
+@click.argument("source", type=click.File("r", encoding="utf-8"))
+@click.option("--format", "fmt", type=click.Choice(["ndjson", "csv"]),
+              help="Input format; defaults to the file extension.")
+@with_appcontext
+def import_data(kind, source, fmt):
+    """Bulk-load complaints or staff users from an NDJSON or CSV file, committing after every batch."""
+    fmt = fmt or ("csv" if source.name.endswith(".csv") else "ndjson")
+    imported = failed = 0
+    batches = ImportManager.import_batches(kind, read_records(source, fmt), current_app.config["IMPORT_BATCH_SIZE"])
+    for result in batches:
+        db.session.commit()
+        imported += result["imported"]
+        failed += len(result["errors"])
+        for error in result["errors"]:
+            click.echo(f"row {error['row']}: {json.dumps(error['errors'])}", err=True)
+    click.echo(f"Imported {imported} {kind}, {failed} rows rejected.")
@@ -0,0 +1,157 @@
+import json
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from werkzeug.exceptions import BadRequest
+
+from db import db
+from managers.auth import load_user, principal_cache
+from managers.complainer import ComplainerManager
+from models import ComplaintModel, RoleType, State, UserModel
+from schemas.request.complaint import RequestComplaintListSchema
+from schemas.response.complaint import complaint_with_complainer_serializer
+from utils.pagination import encode_cursor
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _failed_login(email):
+    # The placeholder password never verifies, so only the user lookup runs
+    try:
+        ComplainerManager.login({"email": email, "password": "plans-check"})
+    except BadRequest:
+        pass
+
+
+def _uncached_load_user(user_id):
+    principal_cache.invalidate(user_id)
+    return load_user(user_id)
+
+
+def _scenarios(complainer, approver):
+    list_schema = RequestComplaintListSchema()
+    cursor = encode_cursor(datetime(2024, 1, 1), 1)
+    return {
+        "get_claims (complainer)":
+            lambda: ComplainerManager.get_claims(complainer, list_schema.load({})),
+        "get_claims (complainer, next page)":
+            lambda: ComplainerManager.get_claims(complainer, list_schema.load({"cursor": cursor})),
+        "get_claims (approver)":
+            lambda: ComplainerManager.get_claims(approver, list_schema.load({})),
+        "get_claims (approver, include=complainer)":
+            lambda: ComplainerManager.get_claims(approver, list_schema.load({"include": "complainer"})),
+        "get_claims (approver, pending)":
+            lambda: ComplainerManager.get_claims(approver, list_schema.load({"status": State.pending.value})),
+        "get_claims (approver, rejected in range)":
+            lambda: ComplainerManager.get_claims(approver, list_schema.load({
+                "status": State.rejected.value,
+                "created_from": "2024-01-01T00:00:00",
+                "created_to": "2024-12-31T00:00:00",
+            })),
+        "get_listing_version": lambda: ComplainerManager.get_listing_version(complainer),
+        "set_status (bulk)": lambda: ComplainerManager.set_status([1, 2, 3], State.approved, approver),
+        "claim_pending": lambda: ComplainerManager.claim_pending(approver, 10),
+        "login": lambda: _failed_login(approver.email),
+        "verify_token": lambda: _uncached_load_user(approver.id),
+    }
+
+
+def _count_statements(func):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+    return len(statements)
+
+
+def _listing_statement_counts(approver, sizes=(1, 25)):
+    """Statements needed to list and serialize complaints with their complainers, per table size.
+
+    Every complaint gets its own complainer and the identity map is emptied before each run,
+    so a lazy-loaded relationship would show up as one extra statement per row.
+    """
+    filters = RequestComplaintListSchema().load({"include": "complainer", "limit": 100})
+    counts, created = {}, 0
+    for size in sizes:
+        for i in range(created, size):
+            complainer = UserModel(email=f"plans-complainer-{i}@example.com", password="-", first_name="Plan",
+                                   last_name="Check", role=RoleType.complainer)
+            db.session.add(ComplaintModel(title="Plan check", description="-", photo_url="-", amount=0,
+                                          complainer=complainer))
+        created = size
+        db.session.flush()
+        db.session.expunge_all()
+        counts[size] = _count_statements(lambda: complaint_with_complainer_serializer.dump(
+            ComplainerManager.get_claims(approver, filters)[0], many=True))
+    return counts
+
+
+@click.command("check-query-plans")
+@with_appcontext
+def check_query_plans():
+    """EXPLAIN every manager query and fail if any of them needs a sequential scan.
+
+    Also fails if listing complaints with their complainers needs more statements as rows are added.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name != "postgresql":
+        raise click.ClickException("Query plans can only be checked against PostgreSQL.")
+
+    # The planner always prefers a seq scan on small tables, so penalise it heavily:
+    # anything that still comes back as a seq scan has no usable index.
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+    complainer = UserModel(email="plans-complainer@example.com", password="-", first_name="Plan",
+                           last_name="Check", role=RoleType.complainer)
+    approver = UserModel(email="plans-approver@example.com", password="-", first_name="Plan",
+                         last_name="Check", role=RoleType.approver)
+    db.session.add_all([complainer, approver])
+    db.session.flush()
+
+    failures = []
+    try:
+        for name, scenario in _scenarios(complainer, approver).items():
+            statements = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                statements.append((statement, parameters))
+
+            event.listen(db.engine, "before_cursor_execute", capture)
+            try:
+                scenario()
+            finally:
+                event.remove(db.engine, "before_cursor_execute", capture)
+
+            for statement, parameters in statements:
+                plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                seq_scans = [node["Relation Name"] for node in _plan_nodes(plan[0]["Plan"])
+                             if node["Node Type"] == "Seq Scan"]
+                status = "SEQ SCAN on " + ", ".join(seq_scans) if seq_scans else "ok"
+                click.echo(f"{name}: {status}")
+                if seq_scans:
+                    failures.append(f"sequential scan in {name}")
+
+        counts = _listing_statement_counts(approver)
+        click.echo("get_claims + serialize (include=complainer) statements: "
+                   + ", ".join(f"{size} rows: {count}" for size, count in counts.items()))
+        if len(set(counts.values())) > 1:
+            failures.append("get_claims (include=complainer) issues a statement per row")
+    finally:
+        db.session.rollback()
+
+    if failures:
+        raise click.ClickException(f"Query checks failed: {'; '.join(failures)}")
@@ -0,0 +1,116 @@
+import time
+import uuid
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event
+
+from db import db
+from models import ComplaintModel, RefreshTokenModel, UserModel
+from services.replicas import replica_router
+
+
+def _send(client, method, path, **kwargs):
+    # A request reuses an app context that is already pushed, and with it the session; give each
+    # one its own so it commits and tears down the way it would in a server
+    with current_app.app_context():
+        return client.open(path, method=method, **kwargs)
+
+
+def _listing_engine(client, headers):
+    """Engine that served the complaint listing query of one GET request."""
+    engines = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if '"COMPLAINTS"' in statement:
+            engines.append(conn.engine)
+
+    engines_to_watch = [db.engine] + replica_router.replicas
+    for engine in engines_to_watch:
+        event.listen(engine, "before_cursor_execute", capture)
+    try:
+        response = _send(client, "GET", "/complainers/complaints", headers=headers)
+    finally:
+        for engine in engines_to_watch:
+            event.remove(engine, "before_cursor_execute", capture)
+    if response.status_code != 200:
+        raise click.ClickException(f"Listing returned {response.status_code}: {response.get_json(silent=True)}")
+    return engines[0] if engines else None
+
+
+def _register(client, email):
+    response = _send(client, "POST", "/register", json={
+        "email": email, "password": "replica-check", "first_name": "Replica", "last_name": "Check",
+        "phone": "0888888888",
+    })
+    if response.status_code != 201:
+        raise click.ClickException(f"Could not register a user: {response.status_code} {response.get_json()}")
+    return {"Authorization": f"Bearer {response.json['token']}"}
+
+
+@click.command("check-replica-routing")
+@with_appcontext
+def check_replica_routing():
+    """Check read/write routing against a primary and at least one replica.
+
+    Point DB_REPLICA_URIS at a second local database with the same schema. Registers two
+    throwaway complainers and files a complaint as the first, then checks that reads go to the
+    primary right after the write for the same client, for the same user without the sticky
+    cookie, and for any client replaying the cookie; and to a replica for another user without
+    the cookie, with a tampered cookie, and once the window has passed. The users are deleted
+    again at the end.
+    """
+    if not replica_router.replicas:
+        raise click.ClickException("No replicas configured; set DB_REPLICA_URIS.")
+
+    client, other_client = current_app.test_client(), current_app.test_client()
+    suffix = uuid.uuid4().hex[:8]
+    emails = [f"replica-check-{suffix}@example.com", f"replica-check-{suffix}-other@example.com"]
+    failures = []
+
+    def expect(name, engine, on_primary):
+        where = "primary" if engine is db.engine else "replica" if engine in replica_router.replicas else "nowhere"
+        ok = (where == "primary") if on_primary else (where == "replica")
+        click.echo(f"{name}: read from {where} {'ok' if ok else 'FAIL'}")
+        if not ok:
+            failures.append(name)
+
+    try:
+        headers = _register(client, emails[0])
+        other_headers = _register(current_app.test_client(), emails[1])
+        response = _send(client, "POST", "/complainers/complaints", headers=headers, json={
+            "title": "Replica check", "description": "Replica check", "photo_url": "https://example.com/check.jpg",
+            "amount": 1,
+        })
+        if response.status_code != 201:
+            raise click.ClickException(f"Could not file a complaint: {response.status_code} {response.get_json()}")
+        sticky_cookie = client.get_cookie(replica_router.cookie_name)
+
+        if sticky_cookie is None:
+            failures.append("write response sets the sticky cookie")
+            click.echo("write response sets the sticky cookie: FAIL")
+        expect("same client right after the write", _listing_engine(client, headers), on_primary=True)
+        # API clients authenticate with a bearer token and never send the cookie back
+        expect("same user without the cookie", _listing_engine(other_client, headers), on_primary=True)
+        expect("other user without the cookie", _listing_engine(other_client, other_headers), on_primary=False)
+        if sticky_cookie is not None:
+            # Another worker only sees what the client sends, so replay the cookie from a fresh client
+            other_client.set_cookie(replica_router.cookie_name, sticky_cookie.value)
+            expect("other user replaying the cookie", _listing_engine(other_client, other_headers), on_primary=True)
+            other_client.set_cookie(replica_router.cookie_name, sticky_cookie.value[:-2] + "xx")
+            expect("tampered cookie", _listing_engine(other_client, other_headers), on_primary=False)
+            other_client.set_cookie(replica_router.cookie_name, sticky_cookie.value)
+        time.sleep(replica_router.sticky_seconds + 1)
+        expect("cookie past the sticky window", _listing_engine(other_client, other_headers), on_primary=False)
+        expect("same user past the sticky window", _listing_engine(current_app.test_client(), headers),
+               on_primary=False)
+    finally:
+        user_ids = db.select(UserModel.id).where(UserModel.email.in_(emails))
+        db.session.execute(db.delete(ComplaintModel).where(ComplaintModel.complainer_id.in_(user_ids)))
+        db.session.execute(db.delete(RefreshTokenModel).where(RefreshTokenModel.user_id.in_(user_ids)))
+        db.session.execute(db.delete(UserModel).where(UserModel.email.in_(emails)))
+        db.session.commit()
+
+    if failures:
+        raise click.ClickException("Replica routing checks failed: " + "; ".join(failures))
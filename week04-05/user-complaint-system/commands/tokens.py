@@ -0,0 +1,12 @@
+import click
+from flask.cli import with_appcontext
+
+from services.revocation import session_revocations
+
+
+@click.command("prune-tokens")
+@with_appcontext
+def prune_tokens():
+    """Delete expired refresh tokens and revocations older than the access-token lifetime."""
+    tokens, revocations = session_revocations.prune()
+    click.echo(f"Deleted {tokens} expired refresh tokens and {revocations} old session revocations.")
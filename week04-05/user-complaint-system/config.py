@@ -1,21 +1,75 @@
-from decouple import config
+import os
 
+from decouple import config, Csv
+from sqlalchemy.pool import NullPool
 
-class ProductionConfig:
-    FLASK_ENV = "prod"
-    DEBUG = False
-    TESTING = False
+from services.pool import InstrumentedQueuePool
+
+
+def engine_options(pool_size, max_overflow):
+    if config("DB_PGBOUNCER_TRANSACTION_MODE", default=False, cast=bool):
+        # PgBouncer does the pooling; holding server connections here would defeat it
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config("DB_POOL_SIZE", default=pool_size, cast=int),
+        "max_overflow": config("DB_MAX_OVERFLOW", default=max_overflow, cast=int),
+        "pool_timeout": config("DB_POOL_TIMEOUT", default=30, cast=float),
+        "pool_recycle": config("DB_POOL_RECYCLE", default=1800, cast=int),
+        "pool_pre_ping": config("DB_POOL_PRE_PING", default=True, cast=bool),
+    }
+
+
+class Config:
     SQLALCHEMY_DATABASE_URI = (
         f"postgresql://{config('DB_USER')}:{config('DB_PASSWORD')}"
         f"@{config('DB_HOST')}:{config('DB_PORT')}/{config('DB_NAME')}"
     )
+    # Optional read replicas for GET requests, e.g. DB_REPLICA_URIS=postgresql://...,postgresql://...
+    SQLALCHEMY_REPLICA_URIS = config("DB_REPLICA_URIS", default="", cast=Csv())
+    REPLICA_EJECT_SECONDS = config("REPLICA_EJECT_SECONDS", default=30, cast=int)
+    REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", default=5, cast=int)
+    REPLICA_HEALTH_CHECK_SECONDS = config("REPLICA_HEALTH_CHECK_SECONDS", default=5, cast=int)
+    SECRET_KEY = config("SECRET_KEY")
+    # Optional key rotation, e.g. JWT_SIGNING_KEYS=2024-06:new-secret,2024-01:old-secret (first one signs)
+    JWT_SIGNING_KEYS = config("JWT_SIGNING_KEYS", default="", cast=Csv())
+    # Access tokens cannot be revoked cheaply once issued, so keep them short; refresh tokens rotate
+    ACCESS_TOKEN_TTL = config("ACCESS_TOKEN_TTL", default=600, cast=int)
+    REFRESH_TOKEN_TTL = config("REFRESH_TOKEN_TTL", default=14 * 24 * 3600, cast=int)
+    REVOCATION_SYNC_INTERVAL = config("REVOCATION_SYNC_INTERVAL", default=5, cast=int)
+    TOKEN_PRUNE_INTERVAL = config("TOKEN_PRUNE_INTERVAL", default=3600, cast=int)
+    TOKEN_MEMO_SIZE = config("TOKEN_MEMO_SIZE", default=10000, cast=int)
+    TOKEN_MEMO_TTL = config("TOKEN_MEMO_TTL", default=300, cast=int)
+    PRINCIPAL_CACHE_SIZE = config("PRINCIPAL_CACHE_SIZE", default=10000, cast=int)
+    PRINCIPAL_CACHE_TTL = config("PRINCIPAL_CACHE_TTL", default=60, cast=int)
+    # Cost parameters must be explicit: stored hashes with a different prefix are rehashed on login
+    PASSWORD_HASH_METHOD = config("PASSWORD_HASH_METHOD", default="pbkdf2:sha256:600000")
+    PASSWORD_HASH_WORKERS = config("PASSWORD_HASH_WORKERS", default=os.cpu_count() or 1, cast=int)
+    PASSWORD_HASH_MAX_PENDING = config("PASSWORD_HASH_MAX_PENDING", default=0, cast=int)
+    PASSWORD_HASH_QUEUE_TIMEOUT = config("PASSWORD_HASH_QUEUE_TIMEOUT", default=5, cast=float)
+    COMPLAINT_LEASE_SECONDS = config("COMPLAINT_LEASE_SECONDS", default=300, cast=int)
+    IMPORT_BATCH_SIZE = config("IMPORT_BATCH_SIZE", default=1000, cast=int)
+    METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+    # Static bearer token for Prometheus; admins can always scrape with their own access token
+    METRICS_TOKEN = config("METRICS_TOKEN", default="")
+    SLOW_QUERY_THRESHOLD_MS = config("SLOW_QUERY_THRESHOLD_MS", default=200, cast=float)
+    SLOW_QUERY_LOG_SIZE = config("SLOW_QUERY_LOG_SIZE", default=200, cast=int)
+    SLOW_QUERY_EXPLAIN = config("SLOW_QUERY_EXPLAIN", default=True, cast=bool)
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS = config("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", default=5000, cast=int)
+    SLOW_QUERY_EXPLAIN_INTERVAL = config("SLOW_QUERY_EXPLAIN_INTERVAL", default=60, cast=int)
+
+
+class ProductionConfig(Config):
+    FLASK_ENV = "prod"
+    DEBUG = False
+    TESTING = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=10, max_overflow=20)
 
 
-class DevelopmentConfig:
+class DevelopmentConfig(Config):
     FLASK_ENV = "development"
     DEBUG = True
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = (
-        f"postgresql://{config('DB_USER')}:{config('DB_PASSWORD')}"
-        f"@{config('DB_HOST')}:{config('DB_PORT')}/{config('DB_NAME')}"
-    )
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=5, max_overflow=5)
+    PASSWORD_HASH_METHOD = config("PASSWORD_HASH_METHOD", default="pbkdf2:sha256:100000")
+    PASSWORD_HASH_WORKERS = config("PASSWORD_HASH_WORKERS", default=0, cast=int)
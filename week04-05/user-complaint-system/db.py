@@ -1,3 +1,104 @@
+from collections import Counter
+from threading import Lock
+
+from flask import g, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+
+from services.replicas import replica_router
+
+
+class RoutingSession(FlaskSession):
+    """Sends reads from read-only requests to a replica; everything else goes to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not self.info.get("has_writes")
+                and (clause is None or clause.is_select)):
+            engine = replica_router.engine_for_request()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+session_stats = Counter()
+_stats_lock = Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        session_stats[name] += 1
+
+
+def finish_session(exception=None):
+    """Commit the request's session only if it wrote something and the request succeeded.
+
+    Read-only requests skip the commit round trip entirely; Flask-SQLAlchemy's own
+    teardown then closes the session and returns the connection to the pool. Runs as a
+    teardown_request hook, so CLI commands and background threads, which push an app
+    context without a request and commit for themselves, are neither committed nor counted.
+    """
+    session = db.session()
+    failed = exception is not None or g.get("response_status", 200) >= 400
+    has_writes = session.info.pop("has_writes", False) or session.new or session.dirty or session.deleted
+    if failed:
+        session.rollback()
+        _count("rollbacks")
+    elif has_writes:
+        session.commit()
+        _count("commits")
+    else:
+        _count("commits_avoided")
+
+
+def stick_after_write(response):
+    """Keep the client's reads on the primary for a while if this request is about to commit a write.
+
+    Runs as an after_request hook: the commit itself happens at teardown, after the response
+    headers are final.
+    """
+    session = db.session()
+    if response.status_code < 400 and (session.info.get("has_writes") or session.new or session.dirty
+                                       or session.deleted):
+        replica_router.stick_to_primary(response)
+    return response
+
+
+@event.listens_for(Session, "after_flush")
+def _flushed(session, flush_context):
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(orm_execute_state):
+    # Core UPDATE/DELETE/INSERT through the session never show up in session.dirty
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["has_writes"] = True
+
+
+@event.listens_for(Engine, "begin")
+def _begin(conn):
+    # Run reads in a READ ONLY transaction where the driver supports it (psycopg2 sends
+    # BEGIN READ ONLY without an extra round trip). The flag is cleared on checkin.
+    if has_request_context() and request.method in READ_ONLY_METHODS and hasattr(conn.dialect, "set_readonly"):
+        conn.dialect.set_readonly(conn.connection.dbapi_connection, True)
+        conn.info["read_only_dialect"] = conn.dialect
+
+
+@event.listens_for(Pool, "checkin")
+def _checkin(dbapi_connection, connection_record):
+    dialect = connection_record.info.pop("read_only_dialect", None)
+    if dialect is not None and dbapi_connection is not None:
+        dialect.set_readonly(dbapi_connection, False)
+
 
-db = SQLAlchemy()
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep autogenerate from dropping the database-only full-text search column and its index."""
+    return not (reflected and compare_to is None and name in {"search_vector", "ix_complaints_search_vector"})
@@ -1,53 +1,228 @@
+import hashlib
+import hmac
+import secrets
+import time
+from collections import namedtuple
 from datetime import datetime, timedelta
 
 import jwt
 import pytz
-from decouple import config
+from flask import current_app, g
 from flask_httpauth import HTTPTokenAuth
-from werkzeug.exceptions import Unauthorized, NotFound
-from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from werkzeug.exceptions import Forbidden, Unauthorized, NotFound
 
 from db import db
+from models.enums import RoleType
+from models.token import RefreshTokenModel, RevokedSessionModel
 from models.user import UserModel
+from services.cache import TTLCache
+from services.hashing import password_hasher
+from services.revocation import session_revocations
+from services.signing import signing_keys
 
 
 class AuthManager:
     @staticmethod
-    def encode_token(user):
+    def encode_token(user, session_id):
         payload = {
             "sub": user.id,
-            "exp": datetime.now(pytz.utc) + timedelta(days=2),
+            "sid": session_id,
+            "exp": datetime.now(pytz.utc) + timedelta(seconds=current_app.config["ACCESS_TOKEN_TTL"]),
             "role": user.role if isinstance(user.role, str) else user.role.name,
         }
-        return jwt.encode(payload, key=config("SECRET_KEY"), algorithm="HS256")
+        return signing_keys.encode(payload)
 
     @staticmethod
     def decode_token(token):
-        try:
-            info = jwt.decode(jwt=token, key=config("SECRET_KEY"), algorithms=["HS256"])
-            return info["sub"], info["role"]
-        except Exception as ex:
-            raise ex
+        # A token seen recently is already verified: skip the signature check until it expires
+        digest = hashlib.sha256(token.encode()).digest()
+        claims = token_memo.get(digest)
+        if claims is None:
+            info = signing_keys.decode(token)
+            if "sid" not in info:
+                raise jwt.InvalidTokenError("Token predates revocable sessions.")
+            claims = info["sub"], info["role"], info["sid"]
+            token_memo.set(digest, claims, ttl=min(token_memo.ttl, info["exp"] - time.time()))
+        # Checked on every call, memo hit or not, so a revocation takes effect immediately
+        if session_revocations.is_revoked(claims[2]):
+            raise jwt.InvalidTokenError("Session has been revoked.")
+        return claims
+
+    @staticmethod
+    def issue_tokens(user, session_id=None):
+        """A short-lived access token and a new refresh token for ``session_id`` (a new session if None)."""
+        session_id = session_id or secrets.token_hex(16)
+        refresh_token = secrets.token_urlsafe(32)
+        db.session.add(RefreshTokenModel(
+            token_hash=hash_refresh_token(refresh_token),
+            session_id=session_id,
+            user_id=user.id,
+            expires_at=datetime.utcnow() + timedelta(seconds=current_app.config["REFRESH_TOKEN_TTL"]),
+        ))
+        return {
+            "token": AuthManager.encode_token(user, session_id),
+            "refresh_token": refresh_token,
+            "expires_in": current_app.config["ACCESS_TOKEN_TTL"],
+        }
+
+    @staticmethod
+    def refresh(refresh_token):
+        stored = db.session.execute(
+            db.select(RefreshTokenModel).
+            where(RefreshTokenModel.token_hash == hash_refresh_token(refresh_token),
+                  RefreshTokenModel.expires_at > datetime.utcnow()).
+            with_for_update()
+        ).scalar()
+        if stored is None or stored.revoked_at is not None:
+            raise Unauthorized("Invalid or expired refresh token.")
+        if stored.replaced_at is not None:
+            # A rotated token came back, so it leaked: end the session for whoever holds it.
+            # Commit now, since the session of a failed request is rolled back.
+            AuthManager.revoke_sessions(stored.user_id, [stored.session_id])
+            db.session.commit()
+            raise Unauthorized("Invalid or expired refresh token.")
+        user = load_user(stored.user_id)
+        if user is None:
+            raise Unauthorized("Invalid or expired refresh token.")
+        stored.replaced_at = datetime.utcnow()
+        return AuthManager.issue_tokens(user, stored.session_id)
+
+    @staticmethod
+    def revoke_sessions(user_id, session_ids=None, session=None):
+        """End the user's live sessions, or only ``session_ids`` of them.
+
+        Their refresh tokens stop working at once and their access tokens as soon as the
+        transaction commits. Runs on the session's connection, so it is safe inside flush events.
+        """
+        session = session or db.session()
+        connection = session.connection()
+        tokens = RefreshTokenModel.__table__
+        query = (db.update(tokens).
+                 where(tokens.c.user_id == user_id,
+                       tokens.c.revoked_at.is_(None),
+                       tokens.c.expires_at > datetime.utcnow()).
+                 values(revoked_at=datetime.utcnow()).
+                 returning(tokens.c.session_id))
+        if session_ids is not None:
+            query = query.where(tokens.c.session_id.in_(session_ids))
+        revoked = set(connection.execute(query).scalars())
+        if revoked:
+            connection.execute(db.insert(RevokedSessionModel.__table__),
+                               [{"session_id": session_id, "user_id": user_id} for session_id in revoked])
+            session.info["has_writes"] = True
+            session_revocations.revoke_after_commit(session, revoked)
+        return revoked
 
     @staticmethod
     def change_password(pass_data):
-        user = auth.current_user()
+        # The cached principal is a read-only snapshot; the row being changed is loaded fresh
+        user = db.session.get(UserModel, auth.current_user().id)
 
-        if not check_password_hash(user.password, pass_data["old_password"]):
+        if not password_hasher.verify(user.password, pass_data["old_password"]):
             raise NotFound("Wrong or invalid password")
-        new_password_hash = generate_password_hash(pass_data["new_password"], method="pbkdf2:sha256")
+        new_password_hash = password_hasher.hash(pass_data["new_password"])
         db.session.execute(db.update(UserModel).
                            where(UserModel.id == user.id).
                            values(password=new_password_hash))
+        principal_cache.invalidate_after_commit(db.session(), user.id)
+        # Every session signed in with the old password ends; the caller continues in a new one
+        AuthManager.revoke_sessions(user.id)
+        return AuthManager.issue_tokens(user)
+
+
+# Immutable copy of a user row: the cache hands the same one to concurrent requests
+UserSnapshot = namedtuple("UserSnapshot", ["id", "email", "first_name", "last_name", "phone", "role", "certificate"])
+
+
+class Principal:
+    """Caller identity built from verified token claims alone.
+
+    The role check needs nothing else, so the user row is only loaded
+    the first time a handler touches any other user attribute.
+    """
+    __slots__ = ("id", "role", "_user")
+
+    def __init__(self, user_id, role):
+        self.id = user_id
+        self.role = role
+        self._user = None
+
+    @property
+    def user(self):
+        if self._user is None:
+            self._user = load_user(self.id)
+            if self._user is None:
+                raise Unauthorized("Invalid or missing token.")
+        return self._user
+
+    def __getattr__(self, name):
+        return getattr(self.user, name)
 
 
 auth = HTTPTokenAuth(scheme="Bearer")
+claims_auth = HTTPTokenAuth(scheme="Bearer")
+metrics_auth = HTTPTokenAuth(scheme="Bearer")
+principal_cache = TTLCache("PRINCIPAL_CACHE")
+token_memo = TTLCache("TOKEN_MEMO")
+
+
+def hash_refresh_token(refresh_token):
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+def load_user(user_id):
+    """The user as a ``UserSnapshot``; handlers that modify the user load the ORM row themselves."""
+    user = principal_cache.get(user_id)
+    if user is None:
+        columns = [getattr(UserModel, field) for field in UserSnapshot._fields]
+        # Always authenticate against the primary: a lagging replica would reject new users
+        row = db.session.execute(db.select(*columns).filter_by(id=user_id),
+                                 bind_arguments={"bind": db.engine}).one_or_none()
+        if row is not None:
+            user = UserSnapshot(*row)
+            principal_cache.set(user_id, user)
+    return user
 
 
 @auth.verify_token
 def verify_token(token):
     try:
-        user_id, type_user = AuthManager.decode_token(token)
-        return db.session.execute(db.select(UserModel).filter_by(id=user_id)).scalar()
+        user_id, type_user, session_id = AuthManager.decode_token(token)
+        # Lets the replica router keep this user's reads on the primary after a write
+        g.principal_id = user_id
+        return load_user(user_id)
+    except Exception as ex:
+        raise Unauthorized("Invalid or missing token.")
+
+
+@claims_auth.verify_token
+def verify_token_claims(token):
+    try:
+        user_id, type_user, session_id = AuthManager.decode_token(token)
+        g.principal_id = user_id
+        return Principal(user_id, RoleType[type_user])
     except Exception as ex:
         raise Unauthorized("Invalid or missing token.")
+
+
+@metrics_auth.verify_token
+def verify_metrics_token(token):
+    # Scrapers present the static METRICS_TOKEN; admins can also use their own access token
+    scrape_token = current_app.config.get("METRICS_TOKEN")
+    if scrape_token and hmac.compare_digest(token.encode(), scrape_token.encode()):
+        return "metrics-scraper"
+    principal = verify_token_claims(token)
+    if principal.role != RoleType.admin:
+        raise Forbidden("You do not have permission to access this resource.")
+    return principal
+
+
+@event.listens_for(Session, "after_flush")
+def _revoke_on_role_change(session, flush_context):
+    # Access tokens carry the role, so a role change has to end the sessions holding the old one
+    for user in session.dirty:
+        if isinstance(user, UserModel) and inspect(user).attrs.role.history.has_changes():
+            AuthManager.revoke_sessions(user.id, session=session)
+            principal_cache.invalidate_after_commit(session, user.id)
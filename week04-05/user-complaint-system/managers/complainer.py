@@ -1,41 +1,211 @@
-from werkzeug.exceptions import BadRequest, NotFound
-from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
+from werkzeug.exceptions import BadRequest, Conflict, NotFound
 
 from db import db
-from managers.auth import AuthManager
-from models import ComplaintModel
+from managers.auth import AuthManager, principal_cache
+from models import ComplaintModel, ComplaintVersionModel
 from models.enums import RoleType, State
 from models.user import UserModel
+from services.hashing import password_hasher
+from services.search import fallback_search_index
+from utils.pagination import decode_cursor, encode_cursor
+
+
+search_vector = db.literal_column('"COMPLAINTS".search_vector', postgresql.TSVECTOR)
 
 
 class ComplainerManager:
     @staticmethod
     def register(complainer_data):
-        complainer_data["password"] = generate_password_hash(
-            complainer_data["password"], method="pbkdf2:sha256"
-        )
+        complainer_data["password"] = password_hasher.hash(complainer_data["password"])
         complainer_data["role"] = RoleType.complainer.name
         user = UserModel(**complainer_data)
         try:
             db.session.add(user)
             db.session.flush()
-            return AuthManager.encode_token(user)
+            return AuthManager.issue_tokens(user)
         except Exception as ex:
             raise BadRequest(str(ex))
 
     @staticmethod
     def login(data):
         user = db.session.execute(db.select(UserModel).filter_by(email=data["email"])).scalar()
-        if not user or not check_password_hash(user.password, data["password"]):
+        if not user or not password_hasher.verify(user.password, data["password"]):
             raise BadRequest("Invalid username or password.")
-        return AuthManager.encode_token(user)
+        if password_hasher.needs_rehash(user.password):
+            user.password = password_hasher.hash(data["password"])
+            db.session.flush()
+            principal_cache.invalidate_after_commit(db.session(), user.id)
+        return AuthManager.issue_tokens(user)
 
     @staticmethod
-    def get_claims(user):
+    def get_claims(user, filters):
         query = db.select(ComplaintModel)
-        if user.role.complainer:
+        if user.role == RoleType.complainer:
+            query = query.filter_by(complainer_id=user.id)
+        query = ComplainerManager._apply_includes(ComplainerManager._apply_filters(query, filters), filters)
+
+        if "cursor" in filters:
+            try:
+                created_on, complaint_id = decode_cursor(filters["cursor"])
+                created_on, complaint_id = datetime.fromisoformat(created_on), int(complaint_id)
+            except (TypeError, ValueError):
+                raise BadRequest("Invalid cursor.")
+            query = query.where(
+                db.tuple_(ComplaintModel.created_on, ComplaintModel.id) < (created_on, complaint_id)
+            )
+
+        limit = filters["limit"]
+        query = query.order_by(ComplaintModel.created_on.desc(), ComplaintModel.id.desc()).limit(limit + 1)
+        complaints = db.session.execute(query).scalars().all()
+
+        next_cursor = None
+        if len(complaints) > limit:
+            complaints = complaints[:limit]
+            last = complaints[-1]
+            next_cursor = encode_cursor(last.created_on, last.id)
+        return complaints, next_cursor
+
+    @staticmethod
+    def export(filters, batch_size=1000):
+        """Yield complaint rows oldest first from a server-side cursor.
+
+        Plain column rows skip the identity map, so memory stays flat however many rows match.
+        """
+        query = (
+            db.select(ComplaintModel.id, ComplaintModel.title, ComplaintModel.description, ComplaintModel.photo_url,
+                      ComplaintModel.amount, ComplaintModel.status, ComplaintModel.created_on)
+            .order_by(ComplaintModel.created_on, ComplaintModel.id)
+            .execution_options(yield_per=batch_size)
+        )
+        yield from db.session.execute(ComplainerManager._apply_filters(query, filters))
+
+    @staticmethod
+    def search(user, filters):
+        """Full-text search ranked by relevance, paginated on (rank, id) like the listing."""
+        if db.session.get_bind().dialect.name != "postgresql":
+            return ComplainerManager._search_fallback(user, filters)
+
+        ts_query = db.func.websearch_to_tsquery("english", filters["q"])
+        rank = db.func.ts_rank(search_vector, ts_query)
+        query = db.select(ComplaintModel, rank).where(search_vector.op("@@")(ts_query))
+        if user.role == RoleType.complainer:
+            query = query.filter_by(complainer_id=user.id)
+        query = ComplainerManager._apply_includes(ComplainerManager._apply_filters(query, filters), filters)
+        if "cursor" in filters:
+            last_rank, last_id = ComplainerManager._decode_search_cursor(filters["cursor"])
+            # ts_rank is a real; compare in real so the boundary row is not returned again
+            query = query.where(db.tuple_(rank, ComplaintModel.id) < db.tuple_(db.cast(last_rank, postgresql.REAL), last_id))
+
+        limit = filters["limit"]
+        rows = db.session.execute(query.order_by(rank.desc(), ComplaintModel.id.desc()).limit(limit + 1)).all()
+        return ComplainerManager._search_page(rows, limit)
+
+    @staticmethod
+    def _search_fallback(user, filters):
+        if not fallback_search_index.loaded:
+            fallback_search_index.load(db.session.execute(
+                db.select(ComplaintModel.id, ComplaintModel.title, ComplaintModel.description)
+            ).all())
+        scores = fallback_search_index.search(filters["q"])
+        if "cursor" in filters:
+            last = ComplainerManager._decode_search_cursor(filters["cursor"])
+            scores = {i: score for i, score in scores.items() if (score, i) < last}
+
+        query = db.select(ComplaintModel).where(ComplaintModel.id.in_(scores))
+        if user.role == RoleType.complainer:
             query = query.filter_by(complainer_id=user.id)
-        return db.session.execute(query).scalars().all()
+        query = ComplainerManager._apply_includes(ComplainerManager._apply_filters(query, filters), filters)
+        complaints = db.session.execute(query).scalars().all()
+        rows = sorted(((c, scores[c.id]) for c in complaints), key=lambda r: (r[1], r[0].id), reverse=True)
+        return ComplainerManager._search_page(rows[:filters["limit"] + 1], filters["limit"])
+
+    @staticmethod
+    def _decode_search_cursor(cursor):
+        try:
+            last_rank, last_id = decode_cursor(cursor)
+            return float(last_rank), int(last_id)
+        except (TypeError, ValueError):
+            raise BadRequest("Invalid cursor.")
+
+    @staticmethod
+    def _search_page(rows, limit):
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last, last_rank = rows[-1]
+            next_cursor = encode_cursor(last_rank, last.id)
+        return [complaint for complaint, _ in rows], next_cursor
+
+    @staticmethod
+    def get_listing_version(user):
+        """Current change counter of the complaints the user can see; a single primary-key lookup."""
+        scope = ComplainerManager._scope(user.id) if user.role == RoleType.complainer else "all"
+        version = db.session.execute(
+            db.select(ComplaintVersionModel.version).filter_by(scope=scope)
+        ).scalar()
+        return scope, version or 0
+
+    @staticmethod
+    def _bump_versions(complainer_ids):
+        """Bump the listing versions the written complaints belong to once the write commits.
+
+        The bump runs in its own short transaction after the commit, so the shared "all" row is
+        locked only for that one statement instead of for every complaint write transaction.
+        A reader that sees the new version therefore also sees the committed changes; one
+        that reads in between gets the old version with the new data and revalidates later.
+        """
+        session = db.session()
+        pending = session.info.get("complaint_version_scopes")
+        if pending is None:
+            pending = session.info["complaint_version_scopes"] = set()
+            event.listen(session, "after_commit", ComplainerManager._bump_committed_versions, once=True)
+        pending.update({"all"} | {ComplainerManager._scope(i) for i in complainer_ids})
+
+    @staticmethod
+    def _bump_committed_versions(session):
+        # Sorted so concurrent bumps lock the rows in the same order and cannot deadlock
+        scopes = sorted(session.info.pop("complaint_version_scopes", ()))
+        if not scopes:
+            return
+        with db.engine.begin() as connection:
+            dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+            statement = dialect.insert(ComplaintVersionModel).values([{"scope": s, "version": 1} for s in scopes])
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[ComplaintVersionModel.scope],
+                set_={"version": ComplaintVersionModel.version + 1},
+            ))
+
+    @staticmethod
+    def _scope(complainer_id):
+        return f"complainer:{complainer_id}"
+
+    @staticmethod
+    def _apply_filters(query, filters):
+        if "status" in filters:
+            query = query.where(ComplaintModel.status == filters["status"])
+        if "created_from" in filters:
+            query = query.where(ComplaintModel.created_on >= filters["created_from"])
+        if "created_to" in filters:
+            query = query.where(ComplaintModel.created_on <= filters["created_to"])
+        if "amount_min" in filters:
+            query = query.where(ComplaintModel.amount >= filters["amount_min"])
+        if "amount_max" in filters:
+            query = query.where(ComplaintModel.amount <= filters["amount_max"])
+        return query
+
+    @staticmethod
+    def _apply_includes(query, filters):
+        if filters.get("include") == "complainer":
+            # Many-to-one, so a join adds no rows; load only what the response shows
+            query = query.options(joinedload(ComplaintModel.complainer).load_only(
+                UserModel.first_name, UserModel.last_name, UserModel.email))
+        return query
 
     @staticmethod
     def create(user, data):
@@ -43,24 +213,85 @@ class ComplainerManager:
         complaint = ComplaintModel(**data)
         db.session.add(complaint)
         db.session.flush()
+        ComplainerManager._bump_versions([complaint.complainer_id])
+        return complaint
 
     @staticmethod
-    def approve(complaint_id):
-        complaint = db.session.execute(db.select(ComplaintModel).filter_by(id=complaint_id)).scalar()
-        if not complaint:
-            raise NotFound
-        complaint.status = State.approved
-        db.session.add(complaint)
-        db.session.flush()
+    def approve(complaint_id, approver):
+        ComplainerManager._set_single_status(complaint_id, State.approved, approver)
 
     @staticmethod
-    def reject(complaint_id):
-        complaint = db.session.execute(db.select(ComplaintModel).filter_by(id=complaint_id)).scalar()
-        if not complaint:
+    def reject(complaint_id, approver):
+        ComplainerManager._set_single_status(complaint_id, State.rejected, approver)
+
+    @staticmethod
+    def set_status(complaint_ids, state, approver):
+        """Resolve pending complaints in one UPDATE ... RETURNING and return the ids that changed.
+
+        Complaints under another approver's unexpired lease are left alone.
+        """
+        updated = db.session.execute(
+            db.update(ComplaintModel)
+            .where(ComplaintModel.id.in_(complaint_ids),
+                   ComplaintModel.status == State.pending,
+                   ComplainerManager._lease_available(approver))
+            .values(status=state, leased_by_id=None, lease_expires_at=None)
+            .returning(ComplaintModel.id, ComplaintModel.complainer_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if updated:
+            ComplainerManager._bump_versions([row.complainer_id for row in updated])
+        return [row.id for row in updated]
+
+    @staticmethod
+    def claim_pending(approver, limit):
+        """Lease the oldest unleased pending complaints to the approver.
+
+        Rows another approver is claiming at the same moment are skipped rather than
+        waited on, so concurrent approvers always get disjoint batches.
+        """
+        lease_expires_at = datetime.utcnow() + timedelta(seconds=current_app.config["COMPLAINT_LEASE_SECONDS"])
+        candidates = (
+            db.select(ComplaintModel.id)
+            .where(ComplaintModel.status == State.pending, ComplainerManager._lease_available())
+            .order_by(ComplaintModel.created_on, ComplaintModel.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        complaints = db.session.execute(
+            db.update(ComplaintModel)
+            .where(ComplaintModel.id.in_(candidates.scalar_subquery()))
+            .values(leased_by_id=approver.id, lease_expires_at=lease_expires_at)
+            .returning(ComplaintModel)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        return sorted(complaints, key=lambda c: (c.created_on, c.id)), lease_expires_at
+
+    @staticmethod
+    def _lease_available(approver=None):
+        condition = db.or_(ComplaintModel.lease_expires_at.is_(None),
+                           ComplaintModel.lease_expires_at < datetime.utcnow())
+        if approver is not None:
+            condition = db.or_(condition, ComplaintModel.leased_by_id == approver.id)
+        return condition
+
+    @staticmethod
+    def _set_single_status(complaint_id, state, approver):
+        if ComplainerManager.set_status([complaint_id], state, approver):
+            return
+        # Only the failure path pays for a second query, to explain why nothing changed
+        complaint = db.session.execute(
+            db.select(ComplaintModel.status).filter_by(id=complaint_id)
+        ).scalar()
+        if complaint is None:
             raise NotFound
-        complaint.status = State.rejected
-        db.session.add(complaint)
-        db.session.flush()
+        if complaint == State.pending:
+            raise Conflict("Complaint is leased by another approver.")
+        raise Conflict("Complaint has already been resolved.")
+
 
-    # db.session.execute(db.update(ComplaintModel).
-    #   where(ComplaintModel.id == complaint_id).values(status=State.rejected))
+@event.listens_for(ComplaintModel, "after_insert")
+@event.listens_for(ComplaintModel, "after_update")
+def _index_complaint(mapper, connection, complaint):
+    if fallback_search_index.loaded:
+        fallback_search_index.add(complaint.id, complaint.title, complaint.description)
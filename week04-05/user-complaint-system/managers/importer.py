@@ -0,0 +1,238 @@
+import csv
+import enum
+import json
+from abc import ABC, abstractmethod
+from datetime import datetime
+from itertools import islice
+
+from marshmallow import ValidationError
+from sqlalchemy.exc import DBAPIError
+from werkzeug.exceptions import HTTPException
+
+from db import db
+from managers.complainer import ComplainerManager
+from models import ComplaintModel, UserModel
+from models.enums import RoleType
+from schemas.request.complaint import RequestImportComplaintSchema
+from schemas.request.user import RequestRegisterStaffUserSchema
+from services.hashing import password_hasher
+from services.search import fallback_search_index
+
+
+def read_records(stream, fmt):
+    """Yield ``(row number, record)`` pairs from an NDJSON or CSV text stream.
+
+    Lines that are not valid JSON come back with a ``None`` record so they can be reported.
+    """
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            # Empty cells mean "not given", so optional fields fall back to their defaults
+            yield number, {key: value for key, value in row.items() if key is not None and value not in ("", None)}
+        return
+
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, json.loads(line)
+        except ValueError:
+            yield number, None
+
+
+def _copy_value(value):
+    if value is None:
+        return r"\N"
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _insert(table, rows, use_copy):
+    if not use_copy:
+        db.session.execute(db.insert(table), rows)
+        return
+
+    connection = db.session.connection()
+    columns = list(rows[0])
+    data = "".join("\t".join(_copy_value(row[c]) for c in columns) + "\n" for row in rows)
+    column_list = ", ".join(f'"{c}"' for c in columns)
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(f'COPY "{table.name}" ({column_list}) FROM STDIN', _Reader(data))
+    finally:
+        cursor.close()
+    # COPY bypasses the ORM, so tell finish_session there is something to commit
+    db.session.info["has_writes"] = True
+
+
+class _Reader:
+    """Minimal file-like object for copy_expert that serves the payload once."""
+
+    def __init__(self, data):
+        self._data = data
+
+    def read(self, size=-1):
+        data, self._data = self._data, ""
+        return data
+
+    readline = read
+
+
+class _Importer(ABC):
+    schema = None
+    model = None
+
+    @abstractmethod
+    def prepare(self, records):
+        """Return ``(rows, errors)`` where rows are ``(row number, column values)`` ready to insert."""
+
+    def loaded(self, rows):
+        pass
+
+
+class _ComplaintImporter(_Importer):
+    schema = RequestImportComplaintSchema()
+    model = ComplaintModel
+
+    def prepare(self, records):
+        complainer_ids = {data["complainer_id"] for _, data in records}
+        known = set(db.session.execute(
+            db.select(UserModel.id).where(UserModel.id.in_(complainer_ids), UserModel.role == RoleType.complainer)
+        ).scalars())
+        now = db.session.execute(db.select(db.func.now())).scalar()
+
+        rows, errors = [], []
+        for number, data in records:
+            if data["complainer_id"] not in known:
+                errors.append({"row": number, "errors": {"complainer_id": ["Unknown complainer."]}})
+                continue
+            rows.append((number, {
+                "title": data["title"],
+                "description": data["description"],
+                "photo_url": data["photo_url"],
+                "amount": data["amount"],
+                "status": data["status"],
+                "complainer_id": data["complainer_id"],
+                "created_on": data.get("created_on", now),
+            }))
+        return rows, errors
+
+    def loaded(self, rows):
+        ComplainerManager._bump_versions([row["complainer_id"] for _, row in rows])
+        fallback_search_index.invalidate()
+
+
+class _StaffUserImporter(_Importer):
+    schema = RequestRegisterStaffUserSchema()
+    model = UserModel
+
+    def prepare(self, records):
+        existing = set(db.session.execute(
+            db.select(UserModel.email).where(UserModel.email.in_({data["email"] for _, data in records}))
+        ).scalars())
+
+        unique, errors = [], []
+        for number, data in records:
+            if data["email"] in existing:
+                errors.append({"row": number, "errors": {"email": ["Email is already registered."]}})
+                continue
+            existing.add(data["email"])
+            unique.append((number, data))
+
+        hashes = password_hasher.hash_many([data["password"] for _, data in unique])
+        rows = []
+        for (number, data), pwhash in zip(unique, hashes):
+            if isinstance(pwhash, Exception):
+                reason = pwhash.description if isinstance(pwhash, HTTPException) else str(pwhash)
+                errors.append({"row": number, "errors": {"password": [f"Could not hash the password: {reason}"]}})
+                continue
+            rows.append((number, {
+                "email": data["email"],
+                "password": pwhash,
+                "first_name": data["first_name"],
+                "last_name": data["last_name"],
+                "phone": data["phone"],
+                "role": RoleType[data["role"]],
+                "certificate": data.get("certificate"),
+            }))
+        return rows, errors
+
+
+IMPORTERS = {
+    "complaints": _ComplaintImporter(),
+    "users": _StaffUserImporter(),
+}
+
+
+class ImportManager:
+    @staticmethod
+    def import_batches(kind, records, batch_size=1000):
+        """Validate and insert records one batch at a time, yielding each batch's result.
+
+        Nothing is committed here: the caller decides whether to commit per batch or at the end.
+        A batch that fails to insert is retried row by row in savepoints, so one bad row only
+        costs itself.
+        """
+        importer = IMPORTERS[kind]
+        records = iter(records)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return
+            yield ImportManager._import_batch(importer, batch)
+
+    @staticmethod
+    def import_all(kind, records, batch_size=1000):
+        result = {"imported": 0, "errors": []}
+        for batch_result in ImportManager.import_batches(kind, records, batch_size):
+            result["imported"] += batch_result["imported"]
+            result["errors"].extend(batch_result["errors"])
+        return result
+
+    @staticmethod
+    def _import_batch(importer, batch):
+        # Rows are loaded one by one rather than with many=True: marshmallow skips the
+        # schema-level validators for the whole batch as soon as any row has a field error.
+        valid, errors = [], []
+        for number, record in batch:
+            if record is None:
+                errors.append({"row": number, "errors": {"_schema": ["Invalid JSON."]}})
+                continue
+            try:
+                valid.append((number, importer.schema.load(record)))
+            except ValidationError as ex:
+                errors.append({"row": number, "errors": ex.messages})
+        if not valid:
+            return {"imported": 0, "errors": errors}
+
+        rows, rejected = importer.prepare(valid)
+        errors.extend(rejected)
+
+        connection = db.session.connection()
+        use_copy = connection.dialect.name == "postgresql"
+        db_errors = (DBAPIError, connection.dialect.dbapi.Error)
+        inserted = rows
+        try:
+            with db.session.begin_nested():
+                if rows:
+                    _insert(importer.model.__table__, [row for _, row in rows], use_copy)
+        except db_errors:
+            inserted = []
+            for number, row in rows:
+                try:
+                    with db.session.begin_nested():
+                        _insert(importer.model.__table__, [row], use_copy=False)
+                except db_errors as ex:
+                    reason = str(getattr(ex, "orig", ex)).splitlines()[0]
+                    errors.append({"row": number, "errors": {"_schema": [reason]}})
+                else:
+                    inserted.append((number, row))
+
+        if inserted:
+            importer.loaded(inserted)
+        errors.sort(key=lambda error: error["row"])
+        return {"imported": len(inserted), "errors": errors}
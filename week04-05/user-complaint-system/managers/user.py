@@ -1,13 +1,14 @@
-from werkzeug.security import generate_password_hash
-
 from db import db
+from managers.auth import principal_cache
 from models import UserModel
+from services.hashing import password_hasher
 
 
 class UserManager:
     @staticmethod
     def create_staff_user(user_data):
-        user_data['password'] = generate_password_hash(user_data['password'], method='pbkdf2:sha256')
+        user_data['password'] = password_hasher.hash(user_data['password'])
         user = UserModel(**user_data)
         db.session.add(user)
         db.session.flush()
+        principal_cache.invalidate_after_commit(db.session(), user.id)
@@ -0,0 +1,37 @@
+"""Complaint search vector
+
+Revision ID: 09da8ab15044
+Revises: 52a150268cfb
+Create Date: 2026-10-18 14:44:12.190358
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '09da8ab15044'
+down_revision = '52a150268cfb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Adding a STORED generated column rewrites COMPLAINTS under an exclusive lock;
+    # only the GIN index can be built concurrently.
+    op.add_column('COMPLAINTS', sa.Column(
+        'search_vector', postgresql.TSVECTOR(),
+        sa.Computed("setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                    "setweight(to_tsvector('english', coalesce(description, '')), 'B')", persisted=True),
+        nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('ix_complaints_search_vector', 'COMPLAINTS', ['search_vector'],
+                        postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_complaints_search_vector', table_name='COMPLAINTS',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_column('COMPLAINTS', 'search_vector')
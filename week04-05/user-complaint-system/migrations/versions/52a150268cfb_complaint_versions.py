@@ -0,0 +1,28 @@
+"""Complaint versions
+
+Revision ID: 52a150268cfb
+Revises: aa88ecb0a5cf
+Create Date: 2026-10-18 14:21:37.806415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '52a150268cfb'
+down_revision = 'aa88ecb0a5cf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('COMPLAINT_VERSIONS',
+    sa.Column('scope', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('scope')
+    )
+
+
+def downgrade():
+    op.drop_table('COMPLAINT_VERSIONS')
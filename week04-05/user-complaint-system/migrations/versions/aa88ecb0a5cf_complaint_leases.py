@@ -0,0 +1,30 @@
+"""Complaint leases
+
+Revision ID: aa88ecb0a5cf
+Revises: db6320cf6440
+Create Date: 2026-10-18 13:48:09.274113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'aa88ecb0a5cf'
+down_revision = 'db6320cf6440'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('COMPLAINTS', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('leased_by_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+        batch_op.create_foreign_key('COMPLAINTS_leased_by_id_fkey', 'USERS', ['leased_by_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('COMPLAINTS', schema=None) as batch_op:
+        batch_op.drop_constraint('COMPLAINTS_leased_by_id_fkey', type_='foreignkey')
+        batch_op.drop_column('lease_expires_at')
+        batch_op.drop_column('leased_by_id')
@@ -0,0 +1,59 @@
+"""Refresh tokens and revoked sessions
+
+Revision ID: b9c8b038a141
+Revises: 09da8ab15044
+Create Date: 2026-10-18 13:47:51.914758
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9c8b038a141'
+down_revision = '09da8ab15044'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('REFRESH_TOKENS',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('token_hash', sa.String(length=64), nullable=False),
+    sa.Column('session_id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_on', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('replaced_at', sa.DateTime(), nullable=True),
+    sa.Column('revoked_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['USERS.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('token_hash')
+    )
+    with op.batch_alter_table('REFRESH_TOKENS', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_REFRESH_TOKENS_expires_at'), ['expires_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_REFRESH_TOKENS_session_id'), ['session_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_REFRESH_TOKENS_user_id'), ['user_id'], unique=False)
+
+    op.create_table('REVOKED_SESSIONS',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('session_id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('revoked_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['USERS.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('REVOKED_SESSIONS', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_REVOKED_SESSIONS_revoked_at'), ['revoked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('REVOKED_SESSIONS', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_REVOKED_SESSIONS_revoked_at'))
+    op.drop_table('REVOKED_SESSIONS')
+    with op.batch_alter_table('REFRESH_TOKENS', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_REFRESH_TOKENS_user_id'))
+        batch_op.drop_index(batch_op.f('ix_REFRESH_TOKENS_session_id'))
+        batch_op.drop_index(batch_op.f('ix_REFRESH_TOKENS_expires_at'))
+
+    op.drop_table('REFRESH_TOKENS')
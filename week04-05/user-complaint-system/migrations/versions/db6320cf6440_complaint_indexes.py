@@ -0,0 +1,46 @@
+"""Complaint indexes
+
+Revision ID: db6320cf6440
+Revises: 8d039075f3c9
+Create Date: 2026-10-18 13:20:41.512604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'db6320cf6440'
+down_revision = '8d039075f3c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_complaints_complainer_id_created_on', 'COMPLAINTS',
+                        ['complainer_id', sa.text('created_on DESC'), sa.text('id DESC')],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_complaints_created_on_id', 'COMPLAINTS',
+                        [sa.text('created_on DESC'), sa.text('id DESC')],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_complaints_status_created_on', 'COMPLAINTS',
+                        ['status', 'created_on'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_complaints_pending_created_on', 'COMPLAINTS',
+                        ['created_on'],
+                        postgresql_where=sa.text("status = 'pending'"),
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_complaints_pending_created_on', table_name='COMPLAINTS',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_complaints_status_created_on', table_name='COMPLAINTS',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_complaints_created_on_id', table_name='COMPLAINTS',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_complaints_complainer_id_created_on', table_name='COMPLAINTS',
+                      postgresql_concurrently=True, if_exists=True)
@@ -1,2 +1,3 @@
 from models.complaint import *
 from models.user import *
+from models.token import *
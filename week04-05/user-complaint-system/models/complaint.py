@@ -21,4 +21,22 @@ class ComplaintModel(db.Model):
         db.Enum(State), default=State.pending, nullable=False
     )
     complainer_id: Mapped[int] = mapped_column(db.Integer, db.ForeignKey("USERS.id"))
-    complainer: Mapped["UserModel"] = relationship("UserModel")
+    complainer: Mapped["UserModel"] = relationship("UserModel", foreign_keys=[complainer_id])
+    leased_by_id: Mapped[int] = mapped_column(db.Integer, db.ForeignKey("USERS.id"), nullable=True)
+    lease_expires_at: Mapped[datetime] = mapped_column(db.DateTime, nullable=True)
+
+
+class ComplaintVersionModel(db.Model):
+    """Change counter per listing scope ("all" or "complainer:<id>"), bumped on every write."""
+    __tablename__ = "COMPLAINT_VERSIONS"
+
+    scope: Mapped[str] = mapped_column(db.String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(db.BigInteger, nullable=False)
+
+
+db.Index("ix_complaints_complainer_id_created_on",
+         ComplaintModel.complainer_id, ComplaintModel.created_on.desc(), ComplaintModel.id.desc())
+db.Index("ix_complaints_created_on_id", ComplaintModel.created_on.desc(), ComplaintModel.id.desc())
+db.Index("ix_complaints_status_created_on", ComplaintModel.status, ComplaintModel.created_on)
+db.Index("ix_complaints_pending_created_on", ComplaintModel.created_on,
+         postgresql_where=ComplaintModel.status == State.pending)
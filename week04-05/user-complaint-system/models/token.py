@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db import db
+
+
+class RefreshTokenModel(db.Model):
+    """One refresh token of a login session; only its SHA-256 digest is stored.
+
+    Refreshing rotates the token: the presented row is marked ``replaced_at`` and a new row
+    with the same ``session_id`` is issued.
+    """
+    __tablename__ = "REFRESH_TOKENS"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    token_hash: Mapped[str] = mapped_column(db.String(64), unique=True, nullable=False)
+    session_id: Mapped[str] = mapped_column(db.String(32), nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(db.Integer, db.ForeignKey("USERS.id"), nullable=False, index=True)
+    created_on: Mapped[datetime] = mapped_column(db.DateTime, server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(db.DateTime, nullable=False, index=True)
+    replaced_at: Mapped[datetime] = mapped_column(db.DateTime, nullable=True)
+    revoked_at: Mapped[datetime] = mapped_column(db.DateTime, nullable=True)
+
+
+class RevokedSessionModel(db.Model):
+    """Sessions whose access tokens must stop working before they expire."""
+    __tablename__ = "REVOKED_SESSIONS"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    session_id: Mapped[str] = mapped_column(db.String(32), nullable=False)
+    user_id: Mapped[int] = mapped_column(db.Integer, db.ForeignKey("USERS.id"), nullable=False)
+    revoked_at: Mapped[datetime] = mapped_column(db.DateTime, server_default=func.now(), index=True)
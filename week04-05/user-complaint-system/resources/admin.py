@@ -0,0 +1,49 @@
+import io
+
+from flask import current_app, request
+from flask_restful import Resource
+from werkzeug.exceptions import NotFound
+
+from db import db, session_stats
+from managers.auth import auth
+from managers.importer import IMPORTERS, ImportManager, read_records
+from models import RoleType
+from services.pool import pool_report
+from services.replicas import replica_router
+from services.slow_queries import slow_query_log
+from utils.decorators import permission_required
+
+
+class DatabasePool(Resource):
+    @auth.login_required
+    @permission_required(RoleType.admin)
+    def get(self):
+        return {
+            "primary": pool_report(db.engine),
+            "replicas": [pool_report(engine) for engine in replica_router.replicas],
+            "sessions": dict(session_stats),
+        }
+
+
+class DataImport(Resource):
+    @auth.login_required
+    @permission_required(RoleType.admin)
+    def post(self, kind):
+        if kind not in IMPORTERS:
+            raise NotFound(f"Cannot import {kind}.")
+        fmt = "csv" if request.mimetype == "text/csv" else "ndjson"
+        records = read_records(io.TextIOWrapper(request.stream, encoding="utf-8"), fmt)
+        return ImportManager.import_all(kind, records, current_app.config["IMPORT_BATCH_SIZE"])
+
+
+class SlowQueries(Resource):
+    @auth.login_required
+    @permission_required(RoleType.admin)
+    def get(self):
+        return {"threshold_ms": slow_query_log.threshold * 1000, "queries": slow_query_log.entries()}
+
+    @auth.login_required
+    @permission_required(RoleType.admin)
+    def delete(self):
+        slow_query_log.clear()
+        return 204
@@ -1,32 +1,32 @@
-from flask import request
 from flask_restful import Resource
 
 from managers.auth import auth, AuthManager
 from managers.complainer import ComplainerManager
-from schemas.request.user import RequestRegisterUserSchema, RequestLoginUserSchema, PasswordChangeSchema
+from schemas.request.user import (RequestRegisterUserSchema, RequestLoginUserSchema, RequestRefreshTokenSchema,
+                                  PasswordChangeSchema)
 from utils.decorators import validate_schema
 
 
 class RegisterComplainer(Resource):
     @validate_schema(RequestRegisterUserSchema)
-    def post(self):
-        data = request.get_json()
-        token = ComplainerManager.register(data)
-        return {"token": token}, 201
+    def post(self, data):
+        return ComplainerManager.register(data), 201
 
 
 class LoginComplainer(Resource):
     @validate_schema(RequestLoginUserSchema)
-    def post(self):
-        data = request.get_json()
-        token = ComplainerManager.login(data)
-        return {"token": token}
+    def post(self, data):
+        return ComplainerManager.login(data)
+
+
+class TokenRefresh(Resource):
+    @validate_schema(RequestRefreshTokenSchema)
+    def post(self, data):
+        return AuthManager.refresh(data["refresh_token"])
 
 
 class Password(Resource):
     @auth.login_required
     @validate_schema(PasswordChangeSchema)
-    def post(self):
-        data = request.get_json()
-        AuthManager.change_password(data)
-        return 204
+    def post(self, data):
+        return AuthManager.change_password(data)
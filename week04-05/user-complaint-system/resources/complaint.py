@@ -1,43 +1,113 @@
-from flask import request
+import hashlib
+
+from flask import Response, request, stream_with_context
 from flask_restful import Resource
+from werkzeug.http import quote_etag
 
-from managers.auth import auth
+from managers.auth import auth, claims_auth
 from managers.complainer import ComplainerManager
 from models import RoleType
-from schemas.request.complaint import RequestComplaintSchema
-from schemas.response.complaint import ResponseComplaintSchema
+from schemas.request.complaint import (RequestComplaintSchema, RequestComplaintListSchema, RequestBulkStatusSchema,
+                                      RequestClaimSchema, RequestComplaintSearchSchema,
+                                      RequestComplaintExportSchema)
+from schemas.response.complaint import complaint_serializer, complaint_with_complainer_serializer
 from utils.decorators import permission_required, validate_schema
+from utils.export import csv_chunks, ndjson_chunks
+
+
+def _list_serializer(filters):
+    return complaint_with_complainer_serializer if filters.get("include") == "complainer" else complaint_serializer
 
 
 class ComplaintListCreate(Resource):
-    @auth.login_required
-    @validate_schema(RequestComplaintSchema)
-    def get(self):
-        user = auth.current_user()
-        complaints = ComplainerManager.get_claims(user)
-        return ResponseComplaintSchema().dump(complaints, many=True)
+    @claims_auth.login_required
+    @validate_schema(RequestComplaintListSchema, location="args")
+    def get(self, filters):
+        user = claims_auth.current_user()
+        scope, version = ComplainerManager.get_listing_version(user)
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        etag = hashlib.sha1(f"{scope}:{version}:{query}".encode()).hexdigest()
+        headers = {"ETag": quote_etag(etag)}
+        if request.if_none_match.contains(etag):
+            return None, 304, headers
+
+        complaints, next_cursor = ComplainerManager.get_claims(user, filters)
+        return {
+            "data": _list_serializer(filters).dump(complaints, many=True),
+            "next_cursor": next_cursor,
+        }, 200, headers
 
     @auth.login_required
     @permission_required(RoleType.complainer)
     @validate_schema(RequestComplaintSchema)
-    def post(self):
+    def post(self, data):
         user = auth.current_user()
-        data = request.get_json()
         complaint = ComplainerManager.create(user, data)
-        return ResponseComplaintSchema().dump(complaint), 201
+        return complaint_serializer.dump(complaint), 201
 
 
 class ComplaintApprove(Resource):
-    @auth.login_required
-    @permission_required(RoleType.approver)
+    @claims_auth.login_required
+    @permission_required(RoleType.approver, using=claims_auth)
     def put(self, complaint_id):
-        ComplainerManager.approve(complaint_id)
+        ComplainerManager.approve(complaint_id, claims_auth.current_user())
         return 204
 
 
 class ComplaintReject(Resource):
-    @auth.login_required
-    @permission_required(RoleType.approver)
+    @claims_auth.login_required
+    @permission_required(RoleType.approver, using=claims_auth)
     def put(self, complaint_id):
-        ComplainerManager.reject(complaint_id)
+        ComplainerManager.reject(complaint_id, claims_auth.current_user())
         return 204
+
+
+class ComplaintBulkStatus(Resource):
+    @claims_auth.login_required
+    @permission_required(RoleType.approver, using=claims_auth)
+    @validate_schema(RequestBulkStatusSchema)
+    def put(self, data):
+        ids = list(dict.fromkeys(data["ids"]))
+        updated = ComplainerManager.set_status(ids, data["status"], claims_auth.current_user())
+        changed = set(updated)
+        return {"updated": updated, "skipped": [i for i in ids if i not in changed]}
+
+
+class ComplaintClaim(Resource):
+    @claims_auth.login_required
+    @permission_required(RoleType.approver, using=claims_auth)
+    @validate_schema(RequestClaimSchema)
+    def post(self, data):
+        complaints, lease_expires_at = ComplainerManager.claim_pending(claims_auth.current_user(), data["limit"])
+        return {
+            "data": complaint_serializer.dump(complaints, many=True),
+            "lease_expires_at": lease_expires_at.isoformat(),
+        }
+
+
+class ComplaintSearch(Resource):
+    @claims_auth.login_required
+    @validate_schema(RequestComplaintSearchSchema, location="args")
+    def get(self, filters):
+        complaints, next_cursor = ComplainerManager.search(claims_auth.current_user(), filters)
+        return {
+            "data": _list_serializer(filters).dump(complaints, many=True),
+            "next_cursor": next_cursor,
+        }
+
+
+class ComplaintExport(Resource):
+    @claims_auth.login_required
+    @permission_required(RoleType.approver, RoleType.admin, using=claims_auth)
+    @validate_schema(RequestComplaintExportSchema, location="args")
+    def get(self, filters):
+        rows = ComplainerManager.export(filters)
+        if filters["format"] == "csv":
+            chunks, mimetype = csv_chunks(rows, complaint_serializer), "text/csv"
+        else:
+            chunks, mimetype = ndjson_chunks(rows, complaint_serializer), "application/x-ndjson"
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename=complaints.{filters['format']}"},
+        )
@@ -0,0 +1,49 @@
+from flask import Response
+from flask_restful import Resource
+
+from db import db, session_stats
+from managers.auth import metrics_auth, principal_cache, token_memo
+from services.metrics import format_histogram, format_metric, request_metrics
+from services.pool import pool_report
+from services.replicas import replica_router
+from services.revocation import session_revocations
+
+
+def _pool_lines():
+    engines = [("primary", db.engine)] + [(f"replica{i}", e) for i, e in enumerate(replica_router.replicas)]
+    reports = [({"engine": name}, pool_report(engine)) for name, engine in engines]
+    lines = []
+    for key, help_text in (("checked_out", "Connections checked out."), ("idle", "Idle pooled connections."),
+                           ("overflow", "Overflow connections open.")):
+        lines += format_metric(f"db_pool_{key}", "gauge", help_text,
+                               [(labels, r[key]) for labels, r in reports if key in r])
+    lines += format_metric("db_pool_overflow_events_total", "counter", "Overflow connections opened.",
+                           [(labels, r["overflow_events"]) for labels, r in reports if "overflow_events" in r])
+    lines += format_metric("db_pool_timeouts_total", "counter", "Checkouts that timed out.",
+                           [(labels, r["timeouts"]) for labels, r in reports if "timeouts" in r])
+    lines += format_histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+                              [(labels, r["checkout_wait_seconds"]) for labels, r in reports
+                               if "checkout_wait_seconds" in r])
+    return lines
+
+
+def _cache_lines(name, description, cache):
+    stats = cache.stats()
+    lines = format_metric(f"{name}_size", "gauge", f"{description} entries.", [({}, stats["size"])])
+    for key in ("hits", "misses", "evictions"):
+        lines += format_metric(f"{name}_{key}_total", "counter", f"{description} {key}.", [({}, stats[key])])
+    return lines
+
+
+class Metrics(Resource):
+    @metrics_auth.login_required
+    def get(self):
+        lines = request_metrics.render()
+        lines += format_metric("db_sessions_total", "counter", "Request sessions by outcome.",
+                               [({"outcome": outcome}, count) for outcome, count in sorted(session_stats.items())])
+        lines += _cache_lines("principal_cache", "Principal cache", principal_cache)
+        lines += _cache_lines("token_memo", "Verified token memo", token_memo)
+        lines += format_metric("revoked_sessions", "gauge", "Revoked sessions held in memory.",
+                               [({}, session_revocations.stats()["size"])])
+        lines += _pool_lines()
+        return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
@@ -1,13 +1,25 @@
-from resources.auth import RegisterComplainer, LoginComplainer, Password
-from resources.complaint import ComplaintListCreate, ComplaintApprove, ComplaintReject
+from resources.admin import DatabasePool, DataImport, SlowQueries
+from resources.auth import RegisterComplainer, LoginComplainer, TokenRefresh, Password
+from resources.complaint import (ComplaintListCreate, ComplaintApprove, ComplaintReject, ComplaintBulkStatus,
+                                 ComplaintClaim, ComplaintSearch, ComplaintExport)
+from resources.metrics import Metrics
 from resources.user import User
 
 routes = (
     (RegisterComplainer, "/register"),
     (LoginComplainer, "/login"),
+    (TokenRefresh, "/token/refresh"),
     (ComplaintListCreate, "/complainers/complaints"),
     (ComplaintApprove, "/complaints/<int:complaint_id>/approve"),
     (ComplaintReject, "/complaints/<int:complaint_id>/reject"),
+    (ComplaintBulkStatus, "/complaints/bulk-status"),
+    (ComplaintClaim, "/complaints/claim"),
+    (ComplaintSearch, "/complaints/search"),
+    (ComplaintExport, "/complaints/export"),
     (User, "/admin/users"),
     (Password, "/users/change-password"),
+    (DatabasePool, "/admin/db-pool"),
+    (DataImport, "/admin/import/<string:kind>"),
+    (SlowQueries, "/admin/slow-queries"),
+    (Metrics, "/metrics"),
 )
@@ -1,4 +1,3 @@
-from flask import request
 from flask_restful import Resource
 from managers.auth import auth
 from managers.user import UserManager
@@ -11,7 +10,6 @@ class User(Resource):
     @auth.login_required
     @permission_required(RoleType.admin)
     @validate_schema(RequestRegisterStaffUserSchema)
-    def post(self):
-        data = request.get_json()
+    def post(self, data):
         UserManager.create_staff_user(data)
         return 201
@@ -1,5 +1,59 @@
+from marshmallow import Schema, fields, validates_schema, ValidationError
+from marshmallow.validate import Length, NoneOf, OneOf, Range
+from marshmallow_enum import EnumField
+
+from models.enums import State
 from schemas.base import BaseComplaintSchema
 
 
 class RequestComplaintSchema(BaseComplaintSchema):
     pass
+
+
+class RequestImportComplaintSchema(RequestComplaintSchema):
+    complainer_id = fields.Integer(required=True)
+    status = EnumField(State, by_value=True, load_default=State.pending)
+    created_on = fields.DateTime()
+
+
+class RequestComplaintListSchema(Schema):
+    limit = fields.Integer(load_default=20, validate=Range(min=1, max=100))
+    cursor = fields.String()
+    status = EnumField(State, by_value=True)
+    created_from = fields.DateTime()
+    created_to = fields.DateTime()
+    amount_min = fields.Float()
+    amount_max = fields.Float()
+    include = fields.String(validate=OneOf(["complainer"]))
+
+    @validates_schema
+    def validate_ranges(self, data, **kwargs):
+        if "created_from" in data and "created_to" in data and data["created_from"] > data["created_to"]:
+            raise ValidationError("created_from must be before created_to.", field_names=["created_from"], )
+        if "amount_min" in data and "amount_max" in data and data["amount_min"] > data["amount_max"]:
+            raise ValidationError("amount_min must not be greater than amount_max.", field_names=["amount_min"], )
+
+
+class RequestComplaintExportSchema(Schema):
+    format = fields.String(load_default="ndjson", validate=OneOf(["ndjson", "csv"]))
+    status = EnumField(State, by_value=True)
+    created_from = fields.DateTime()
+    created_to = fields.DateTime()
+
+    @validates_schema
+    def validate_ranges(self, data, **kwargs):
+        if "created_from" in data and "created_to" in data and data["created_from"] > data["created_to"]:
+            raise ValidationError("created_from must be before created_to.", field_names=["created_from"], )
+
+
+class RequestComplaintSearchSchema(RequestComplaintListSchema):
+    q = fields.String(required=True, validate=Length(min=1, max=200))
+
+
+class RequestBulkStatusSchema(Schema):
+    ids = fields.List(fields.Integer(), required=True, validate=Length(min=1, max=1000))
+    status = EnumField(State, by_value=True, required=True, validate=NoneOf([State.pending]))
+
+
+class RequestClaimSchema(Schema):
+    limit = fields.Integer(load_default=10, validate=Range(min=1, max=100))
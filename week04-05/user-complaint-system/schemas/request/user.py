@@ -17,6 +17,10 @@ class RequestLoginUserSchema(UserSchema):
     pass
 
 
+class RequestRefreshTokenSchema(Schema):
+    refresh_token = fields.String(required=True)
+
+
 class RequestRegisterStaffUserSchema(RequestRegisterUserSchema):
     role = fields.String(required=True, validate=OneOf(["admin", "approver"]))
     certificate = fields.URL()
@@ -3,9 +3,19 @@ from marshmallow_enum import EnumField
 
 from models.enums import State
 from schemas.base import BaseComplaintSchema
+from schemas.response.user import ResponseComplainerSchema
+from utils.serializers import CompiledSerializer
 
 
 class ResponseComplaintSchema(BaseComplaintSchema):
     id = fields.Integer(required=True)
     status = EnumField(State, by_value=True)
-    created_on = fields.DateTime(required=True)
\ No newline at end of file
+    created_on = fields.DateTime(required=True)
+
+
+class ResponseComplaintWithComplainerSchema(ResponseComplaintSchema):
+    complainer = fields.Nested(ResponseComplainerSchema)
+
+
+complaint_serializer = CompiledSerializer(ResponseComplaintSchema)
+complaint_with_complainer_serializer = CompiledSerializer(ResponseComplaintWithComplainerSchema)
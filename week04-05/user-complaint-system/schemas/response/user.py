@@ -0,0 +1,8 @@
+from marshmallow import Schema, fields
+
+
+class ResponseComplainerSchema(Schema):
+    id = fields.Integer(required=True)
+    first_name = fields.String(required=True)
+    last_name = fields.String(required=True)
+    email = fields.String(required=True)
@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from sqlalchemy import event
+
+
+class TTLCache:
+    """Size-bounded LRU cache whose entries also expire after a TTL.
+
+    Size and TTL are read from ``<prefix>_SIZE`` and ``<prefix>_TTL`` in the app config.
+    """
+
+    def __init__(self, config_prefix, maxsize=1024, ttl=60):
+        self.config_prefix = config_prefix
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.maxsize = app.config.get(f"{self.config_prefix}_SIZE", self.maxsize)
+        self.ttl = app.config.get(f"{self.config_prefix}_TTL", self.ttl)
+        self.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_after_commit(self, session, key):
+        # Drop the entry now and again once the write is visible, so a concurrent
+        # request cannot re-cache the old row in between.
+        self.invalidate(key)
+        event.listen(session, "after_commit", lambda s: self.invalidate(key), once=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
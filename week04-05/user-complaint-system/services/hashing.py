@@ -0,0 +1,95 @@
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from threading import BoundedSemaphore
+
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasher:
+    """Runs password hashing in a bounded process pool so it does not pin request threads.
+
+    ``PASSWORD_HASH_METHOD`` must spell out its cost parameters (e.g. ``pbkdf2:sha256:600000``)
+    because stored hashes are compared against it verbatim to decide when to rehash.
+    With ``PASSWORD_HASH_WORKERS = 0`` hashing runs inline on the calling thread.
+    Bulk hashing may hold at most half of the ``PASSWORD_HASH_MAX_PENDING`` slots, so a large
+    import cannot crowd out logins.
+    """
+
+    def __init__(self):
+        self.method = "pbkdf2:sha256:600000"
+        self.workers = 0
+        self.queue_timeout = 5
+        self._pool = None
+        self._slots = BoundedSemaphore(4)
+        self._batch_slots = BoundedSemaphore(2)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.method = app.config.get("PASSWORD_HASH_METHOD", self.method)
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", self.workers)
+        self.queue_timeout = app.config.get("PASSWORD_HASH_QUEUE_TIMEOUT", self.queue_timeout)
+        max_pending = app.config.get("PASSWORD_HASH_MAX_PENDING") or max(self.workers, 1) * 4
+        self._slots = BoundedSemaphore(max_pending)
+        self._batch_slots = BoundedSemaphore(max(max_pending // 2, 1))
+
+    def hash(self, password):
+        return self._submit(generate_password_hash, password, self.method).result()
+
+    def hash_many(self, passwords):
+        """Hash every password, returning the exception instead of a hash for any that failed.
+
+        A password that gets no slot within the queue timeout fails on its own; the rest of the
+        batch still goes through.
+        """
+        futures = []
+        for password in passwords:
+            # Wait for an earlier password of a batch to finish rather than take another shared slot
+            self._batch_slots.acquire()
+            try:
+                future = self._submit(generate_password_hash, password, self.method)
+            except Exception as ex:
+                self._batch_slots.release()
+                future = Future()
+                future.set_exception(ex)
+            else:
+                future.add_done_callback(lambda f: self._batch_slots.release())
+            futures.append(future)
+        return [future.exception() or future.result() for future in futures]
+
+    def verify(self, pwhash, password):
+        return self._submit(check_password_hash, pwhash, password).result()
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split("$", 1)[0] != self.method
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _submit(self, func, *args):
+        if not self.workers:
+            future = Future()
+            future.set_result(func(*args))
+            return future
+
+        # Queue for at most queue_timeout seconds, then shed load instead of piling up
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise ServiceUnavailable("Too many password operations in progress, try again later.")
+        try:
+            future = self._get_pool().submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        return future
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn rather than fork: the web process is threaded and holds DB connections
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+
+password_hasher = PasswordHasher()
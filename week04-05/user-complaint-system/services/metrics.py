@@ -0,0 +1,177 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus (cumulative, ``le``) semantics."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {"buckets": cumulative, "sum": total, "count": running}
+
+
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}" if labels else ""
+
+
+def format_metric(name, kind, help_text, samples):
+    """Prometheus text for a counter or gauge; ``samples`` is a list of ``(labels, value)``."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_labels(labels)} {value}" for labels, value in samples]
+    return lines
+
+
+def format_histogram(name, help_text, series):
+    """Prometheus text for histograms; ``series`` is a list of ``(labels, Histogram.snapshot())``."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, snapshot in series:
+        for bound, count in snapshot["buckets"].items():
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {snapshot['sum']}")
+        lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+class RequestTimings:
+    __slots__ = ("start", "sql", "statements", "validation", "serialization")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql = self.statements = self.validation = self.serialization = 0
+
+
+class RouteMetrics:
+    __slots__ = ("latency", "sql", "statements", "validation", "serialization")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.sql = Histogram()
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.validation = Histogram()
+        self.serialization = Histogram()
+
+
+class RequestMetrics:
+    """Per route and method: latency, SQL time, statement count, validation and serialization time.
+
+    The hooks are always installed; ``METRICS_ENABLED = False`` (or flipping ``enabled``)
+    makes them return immediately.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._routes = {}
+        self._lock = Lock()
+        self._installed = False
+
+    def init_app(self, app):
+        self.enabled = app.config.get("METRICS_ENABLED", self.enabled)
+        # Installing the hooks twice would time and count every request twice
+        if "request_metrics" not in app.extensions:
+            app.before_request(self._start)
+            app.after_request(self._response)
+            app.teardown_request(self._finish)
+            app.extensions["request_metrics"] = self
+        if not self._installed:
+            event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+            self._installed = True
+
+    @staticmethod
+    def current():
+        return g.get("request_timings") if has_request_context() else None
+
+    def add(self, kind, seconds):
+        """Charge ``seconds`` of validation or serialization work to the current request."""
+        timings = self.current()
+        if timings is not None:
+            setattr(timings, kind, getattr(timings, kind) + seconds)
+
+    def render(self):
+        with self._lock:
+            routes = sorted(self._routes.items())
+        series = {name: [] for name in RouteMetrics.__slots__}
+        for (route, method), metrics in routes:
+            labels = {"route": route, "method": method}
+            for name in RouteMetrics.__slots__:
+                series[name].append((labels, getattr(metrics, name).snapshot()))
+        return (
+            format_histogram("http_request_duration_seconds", "Request latency.", series["latency"])
+            + format_histogram("http_request_sql_seconds", "Time spent executing SQL per request.", series["sql"])
+            + format_histogram("http_request_sql_statements", "SQL statements per request.", series["statements"])
+            + format_histogram("http_request_validation_seconds", "Time spent loading request schemas.",
+                               series["validation"])
+            + format_histogram("http_request_serialization_seconds", "Time spent dumping response schemas.",
+                               series["serialization"])
+        )
+
+    def _start(self):
+        if self.enabled:
+            g.request_timings = RequestTimings()
+
+    @staticmethod
+    def _response(response):
+        # stream_with_context tears the request down once before the body is sent and
+        # again after it; only the second teardown sees the full cost of the response.
+        if response.is_streamed and "request_timings" in g:
+            g.request_timings_streaming = True
+        return response
+
+    def _finish(self, exception=None):
+        if g.pop("request_timings_streaming", False):
+            return
+        timings = g.pop("request_timings", None)
+        if timings is None:
+            return
+        key = (request.url_rule.rule if request.url_rule else "<unmatched>", request.method)
+        metrics = self._routes.get(key)
+        if metrics is None:
+            with self._lock:
+                metrics = self._routes.setdefault(key, RouteMetrics())
+        metrics.latency.observe(time.perf_counter() - timings.start)
+        metrics.sql.observe(timings.sql)
+        metrics.statements.observe(timings.statements)
+        metrics.validation.observe(timings.validation)
+        metrics.serialization.observe(timings.serialization)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.current() is not None:
+            conn.info["request_metrics_start"] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("request_metrics_start", None)
+        timings = self.current()
+        if timings is not None and started is not None:
+            timings.sql += time.perf_counter() - started
+            timings.statements += 1
+
+
+request_metrics = RequestMetrics()
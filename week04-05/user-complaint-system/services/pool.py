@@ -0,0 +1,54 @@
+import time
+from threading import Lock
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+from services.metrics import Histogram
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait, overflow connections and timeouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_wait = Histogram()
+        self.overflow_events = 0
+        self.timeouts = 0
+        self._metrics_lock = Lock()
+
+    def recreate(self):
+        pool = super().recreate()
+        # Keep the history when the engine is disposed and the pool rebuilt
+        pool.checkout_wait, pool.overflow_events, pool.timeouts = self.checkout_wait, self.overflow_events, self.timeouts
+        return pool
+
+    def _inc_overflow(self):
+        created = super()._inc_overflow()
+        if created and self._overflow > 0:
+            with self._metrics_lock:
+                self.overflow_events += 1
+        return created
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        self.checkout_wait.observe(time.perf_counter() - start)
+        return record
+
+
+def pool_report(engine):
+    pool = engine.pool
+    report = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        report.update(size=pool.size(), checked_out=pool.checkedout(), idle=pool.checkedin(),
+                      overflow=max(pool.overflow(), 0))
+    if isinstance(pool, InstrumentedQueuePool):
+        report.update(checkout_wait_seconds=pool.checkout_wait.snapshot(),
+                      overflow_events=pool.overflow_events, timeouts=pool.timeouts)
+    return report
@@ -0,0 +1,123 @@
+import time
+from threading import Lock
+
+from flask import g, has_request_context, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import create_engine, event
+
+from services.cache import TTLCache
+
+
+class ReplicaRouter:
+    """Round-robins read-only requests over healthy replicas.
+
+    A replica that fails to connect or drops a connection is ejected for
+    ``REPLICA_EJECT_SECONDS``; one that answered a health check is trusted for
+    ``REPLICA_HEALTH_CHECK_SECONDS`` before it is probed again.
+
+    After a client commits a write, its reads stay on the primary for
+    ``REPLICA_STICKY_SECONDS`` so it sees its own changes despite replication lag. The window
+    is kept per authenticated user in this process, which covers bearer-token clients, and
+    also sent as a signed, timestamped cookie, which holds on whichever worker serves a
+    client that sends cookies back. A bearer-only client whose next read lands on another
+    worker process can still see the replica's lag.
+    """
+
+    cookie_name = "primary_reads"
+
+    def __init__(self):
+        self.replicas = []
+        self.eject_seconds = 30
+        self.sticky_seconds = 5
+        self.health_check_seconds = 5
+        self._next = 0
+        self._ejected_until = {}
+        self._healthy_until = {}
+        self._sticky_users = TTLCache("REPLICA_STICKY_USERS")
+        self._serializer = None
+        self._lock = Lock()
+
+    def init_app(self, app):
+        for engine in self.replicas:
+            engine.dispose()
+        self.eject_seconds = app.config.get("REPLICA_EJECT_SECONDS", self.eject_seconds)
+        self.sticky_seconds = app.config.get("REPLICA_STICKY_SECONDS", self.sticky_seconds)
+        self.health_check_seconds = app.config.get("REPLICA_HEALTH_CHECK_SECONDS", self.health_check_seconds)
+        self._sticky_users = TTLCache("REPLICA_STICKY_USERS", maxsize=10000, ttl=self.sticky_seconds)
+        engine_options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+        self.replicas = [create_engine(uri, **engine_options) for uri in app.config.get("SQLALCHEMY_REPLICA_URIS", [])]
+        self._ejected_until.clear()
+        self._healthy_until.clear()
+        self._serializer = URLSafeTimedSerializer(app.secret_key, salt="replica-sticky")
+        for engine in self.replicas:
+            event.listen(engine, "handle_error", self._handle_error)
+
+    def engine_for_request(self):
+        """Replica engine for the current request, or None if it must use the primary."""
+        if not self.replicas or not has_request_context() or request.method not in {"GET", "HEAD"}:
+            return None
+        if self._sticky():
+            return None
+        if "replica_engine" not in g:
+            # One replica per request so every read in it sees the same snapshot
+            g.replica_engine = self._pick()
+        return g.replica_engine
+
+    def stick_to_primary(self, response):
+        """Keep the client that gets ``response``, and the user it is signed in as, on the primary."""
+        if self.replicas and self.sticky_seconds > 0:
+            if g.get("principal_id") is not None:
+                self._sticky_users.set(g.principal_id, True)
+            response.set_cookie(self.cookie_name, self._serializer.dumps(1), max_age=self.sticky_seconds,
+                                httponly=True, samesite="Lax")
+        return response
+
+    def eject(self, engine):
+        with self._lock:
+            self._ejected_until[engine] = time.monotonic() + self.eject_seconds
+            self._healthy_until.pop(engine, None)
+
+    def healthy(self):
+        now = time.monotonic()
+        return [engine for engine in self.replicas if self._ejected_until.get(engine, 0) <= now]
+
+    def _pick(self):
+        healthy = self.healthy()
+        with self._lock:
+            self._next = (self._next + 1) % max(len(healthy), 1)
+            start = self._next
+        now = time.monotonic()
+        for engine in healthy[start:] + healthy[:start]:
+            # Failures of real queries eject a replica through _handle_error, so a recently
+            # checked one is used without another probe (with pre-ping, each is a SELECT 1)
+            if self._healthy_until.get(engine, 0) > now:
+                return engine
+            try:
+                with engine.connect():
+                    pass
+            except Exception:
+                self.eject(engine)
+                continue
+            with self._lock:
+                self._healthy_until[engine] = now + self.health_check_seconds
+            return engine
+        return None
+
+    def _sticky(self):
+        if g.get("principal_id") is not None and self._sticky_users.get(g.principal_id):
+            return True
+        value = request.cookies.get(self.cookie_name)
+        if not value:
+            return False
+        try:
+            self._serializer.loads(value, max_age=self.sticky_seconds)
+        except BadSignature:
+            return False
+        return True
+
+    def _handle_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.eject(context.engine)
+
+
+replica_router = ReplicaRouter()
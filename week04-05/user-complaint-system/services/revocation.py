@@ -0,0 +1,122 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from threading import Lock, Thread
+
+from sqlalchemy import delete, event, func, select
+
+from db import db
+from models.token import RefreshTokenModel, RevokedSessionModel
+
+logger = logging.getLogger(__name__)
+
+
+class SessionRevocations:
+    """Ids of recently revoked login sessions, checked against every access token in memory.
+
+    An access token lives at most ``ACCESS_TOKEN_TTL`` seconds, so only sessions revoked
+    within that window (plus a minute of clock slack) can still have a usable token; older
+    rows in ``REVOKED_SESSIONS`` are never loaded. The set is built from the database the
+    first time a token is checked, then reloaded every ``REVOCATION_SYNC_INTERVAL`` seconds
+    on a background thread to pick up revocations made by other processes. Revocations made
+    by this process are added as soon as their transaction commits. Checking a token never
+    touches the database.
+
+    The same thread deletes expired refresh tokens and revocations older than the window every
+    ``TOKEN_PRUNE_INTERVAL`` seconds; ``flask prune-tokens`` does it on demand.
+    """
+
+    clock_slack = 60
+
+    def __init__(self):
+        self.window = 600
+        self.sync_interval = 5
+        self.prune_interval = 3600
+        self._engine = None
+        self._revoked = frozenset()
+        # Locally revoked ids by the time they were added, kept until a reload has seen them
+        self._recent = {}
+        self._loaded = False
+        self._lock = Lock()
+        self._load_lock = Lock()
+
+    def init_app(self, app):
+        self.window = app.config.get("ACCESS_TOKEN_TTL", self.window) + self.clock_slack
+        self.sync_interval = app.config.get("REVOCATION_SYNC_INTERVAL", self.sync_interval)
+        self.prune_interval = app.config.get("TOKEN_PRUNE_INTERVAL", self.prune_interval)
+        # The sync thread runs queries without an app context, so it must not need one
+        with app.app_context():
+            self._engine = db.engine
+        with self._lock:
+            self._revoked = frozenset()
+            self._recent.clear()
+
+    def is_revoked(self, session_id):
+        if not self._loaded:
+            self._load()
+        return session_id in self._revoked
+
+    def revoke_after_commit(self, session, session_ids):
+        session_ids = frozenset(session_ids)
+        if session_ids:
+            event.listen(session, "after_commit", lambda s: self._add(session_ids), once=True)
+
+    def reload(self):
+        started = time.monotonic()
+        with self._engine.connect() as connection:
+            session_ids = frozenset(connection.execute(
+                select(RevokedSessionModel.session_id).
+                where(RevokedSessionModel.revoked_at > func.now() - timedelta(seconds=self.window))
+            ).scalars())
+        with self._lock:
+            # A revocation committed here while the query ran may be missing from its result
+            self._recent = {key: added for key, added in self._recent.items() if added >= started}
+            self._revoked = session_ids | self._recent.keys()
+
+    def prune(self):
+        """Delete expired refresh tokens and revocations no live access token can need; returns both counts."""
+        with self._engine.begin() as connection:
+            tokens = connection.execute(
+                delete(RefreshTokenModel).where(RefreshTokenModel.expires_at < datetime.utcnow())
+            ).rowcount
+            revocations = connection.execute(
+                delete(RevokedSessionModel).
+                where(RevokedSessionModel.revoked_at < func.now() - timedelta(seconds=self.window))
+            ).rowcount
+        return tokens, revocations
+
+    def stats(self):
+        return {"size": len(self._revoked)}
+
+    def _add(self, session_ids):
+        now = time.monotonic()
+        with self._lock:
+            self._recent.update(dict.fromkeys(session_ids, now))
+            self._revoked = self._revoked | session_ids
+
+    def _load(self):
+        with self._load_lock:
+            if self._loaded:
+                return
+            self.reload()
+            self._loaded = True
+            if self.sync_interval > 0:
+                Thread(target=self._sync, name="session-revocations", daemon=True).start()
+
+    def _sync(self):
+        pruned_at = time.monotonic()
+        while True:
+            time.sleep(self.sync_interval)
+            try:
+                self.reload()
+            except Exception:
+                logger.exception("Could not reload revoked sessions; keeping the previous set")
+            if self.prune_interval > 0 and time.monotonic() - pruned_at >= self.prune_interval:
+                pruned_at = time.monotonic()
+                try:
+                    self.prune()
+                except Exception:
+                    logger.exception("Could not prune expired refresh tokens and revocations")
+
+
+session_revocations = SessionRevocations()
@@ -0,0 +1,80 @@
+import re
+from collections import defaultdict
+from threading import Lock
+
+_TOKEN = re.compile(r"\w+")
+TITLE_WEIGHT = 2
+
+
+def tokenize(text):
+    return _TOKEN.findall((text or "").lower())
+
+
+class InMemorySearchIndex:
+    """Inverted index over complaint title/description for databases without full-text search.
+
+    Used on SQLite test runs in place of the Postgres ``search_vector`` column. Built from the
+    database on first use and kept current by the ComplaintModel mapper events. Results are
+    only candidates: callers re-check them against the database.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._loaded = False
+        self._lock = Lock()
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def load(self, rows):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            for complaint_id, title, description in rows:
+                self._add(complaint_id, title, description)
+            self._loaded = True
+
+    def add(self, complaint_id, title, description):
+        with self._lock:
+            self._remove(complaint_id)
+            self._add(complaint_id, title, description)
+
+    def invalidate(self):
+        """Drop the index so it is rebuilt on next use, e.g. after rows were inserted in bulk."""
+        with self._lock:
+            self._loaded = False
+
+    def search(self, query):
+        """Map of complaint id to score for complaints containing every query term."""
+        terms = set(tokenize(query))
+        if not terms:
+            return {}
+        with self._lock:
+            postings = sorted((self._postings.get(term, {}) for term in terms), key=len)
+            scores = dict(postings[0])
+            for posting in postings[1:]:
+                scores = {i: score + posting[i] for i, score in scores.items() if i in posting}
+        return scores
+
+    def _add(self, complaint_id, title, description):
+        weights = defaultdict(int)
+        for token in tokenize(title):
+            weights[token] += TITLE_WEIGHT
+        for token in tokenize(description):
+            weights[token] += 1
+        for token, weight in weights.items():
+            self._postings[token][complaint_id] = weight
+        self._documents[complaint_id] = tuple(weights)
+
+    def _remove(self, complaint_id):
+        for token in self._documents.pop(complaint_id, ()):
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.pop(complaint_id, None)
+                if not posting:
+                    del self._postings[token]
+
+
+fallback_search_index = InMemorySearchIndex()
@@ -0,0 +1,39 @@
+import jwt
+
+
+class SigningKeys:
+    """JWT signing keys by ``kid``, read from the app config once at startup.
+
+    ``JWT_SIGNING_KEYS`` is a list of ``kid:secret`` pairs. The first one signs new tokens;
+    the rest are only accepted for verification, so a key can be rotated out by moving a new
+    one to the front and dropping the old one once its tokens have expired. Without it,
+    ``SECRET_KEY`` is the only key, under kid ``default``. Tokens without a ``kid`` header
+    (issued before rotation was introduced) are verified with the ``default`` key.
+    """
+
+    algorithm = "HS256"
+
+    def __init__(self):
+        self.active_kid = None
+        self._keys = {}
+
+    def init_app(self, app):
+        pairs = [pair.split(":", 1) for pair in app.config.get("JWT_SIGNING_KEYS") or []]
+        if not pairs:
+            pairs = [("default", app.config["SECRET_KEY"])]
+        self._keys = {kid: secret for kid, secret in pairs}
+        self.active_kid = pairs[0][0]
+
+    def encode(self, payload):
+        return jwt.encode(payload, key=self._keys[self.active_kid], algorithm=self.algorithm,
+                          headers={"kid": self.active_kid})
+
+    def decode(self, token):
+        kid = jwt.get_unverified_header(token).get("kid", "default")
+        key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key {kid!r}.")
+        return jwt.decode(jwt=token, key=key, algorithms=[self.algorithm])
+
+
+signing_keys = SigningKeys()
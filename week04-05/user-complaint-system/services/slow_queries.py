@@ -0,0 +1,171 @@
+import logging
+import re
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from threading import BoundedSemaphore, Lock
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+# Expanded IN lists render one placeholder per value; collapse them so the SQL stays comparable
+_PLACEHOLDER_LIST = re.compile(r"(\bIN \()(%\(\w+\)s|\?)(?:,\s*(?:%\(\w+\)s|\?))+\)", re.IGNORECASE)
+_EXPANDED_PARAMETER = re.compile(r"^(\w+_\d+)_\d+$")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE)\b")
+_ROW_LOCKS = re.compile(r"\bFOR\s+(NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b")
+
+
+def normalize_sql(statement):
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _STRING.sub("'?'", statement)
+    statement = _NUMBER.sub("?", statement)
+    return _PLACEHOLDER_LIST.sub(r"\1\2, ...)", statement)
+
+
+def parameter_shapes(parameters):
+    """Types (and sizes for sequences) of the bound values, never the values themselves."""
+    def shape(value):
+        if isinstance(value, (list, tuple, set)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return type(value).__name__
+
+    if isinstance(parameters, dict):
+        shapes, expanded_counts = {}, Counter()
+        for name, value in parameters.items():
+            # An expanded IN list binds id_1_1, id_1_2, ...; report it as one list-shaped entry
+            expanded = _EXPANDED_PARAMETER.match(name)
+            if expanded:
+                key = f"{expanded.group(1)}[]"
+                expanded_counts[key] += 1
+                shapes[key] = f"{shape(value)}[{expanded_counts[key]}]"
+            else:
+                shapes[name] = shape(value)
+        return shapes
+    if isinstance(parameters, (list, tuple)):
+        return [shape(value) for value in parameters]
+    return shape(parameters)
+
+
+class SlowQueryLog:
+    """Keeps the last ``SLOW_QUERY_LOG_SIZE`` statements slower than ``SLOW_QUERY_THRESHOLD_MS``.
+
+    On PostgreSQL each entry gets an ``EXPLAIN`` plan captured on a background thread, so the
+    request that ran the query is never held up by it. Reads are re-run with ``ANALYZE, BUFFERS``;
+    writes and locking reads only get a plain ``EXPLAIN``, since executing them again would
+    take row locks against live traffic. Each distinct statement is explained at most once per
+    ``SLOW_QUERY_EXPLAIN_INTERVAL`` seconds.
+    """
+
+    def __init__(self):
+        self.threshold = 0.2
+        self.explain = True
+        self.explain_timeout_ms = 5000
+        self.explain_interval = 60
+        self._entries = deque(maxlen=200)
+        self._explained_at = {}
+        self._executor = None
+        self._slots = BoundedSemaphore(10)
+        self._lock = Lock()
+        self._installed = False
+
+    def init_app(self, app):
+        self.threshold = app.config.get("SLOW_QUERY_THRESHOLD_MS", self.threshold * 1000) / 1000
+        self.explain = app.config.get("SLOW_QUERY_EXPLAIN", self.explain)
+        self.explain_timeout_ms = app.config.get("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", self.explain_timeout_ms)
+        self.explain_interval = app.config.get("SLOW_QUERY_EXPLAIN_INTERVAL", self.explain_interval)
+        self._entries = deque(maxlen=app.config.get("SLOW_QUERY_LOG_SIZE", self._entries.maxlen))
+        self._explained_at.clear()
+        if not self._installed:
+            event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+            self._installed = True
+
+    def entries(self):
+        """Logged statements, newest first."""
+        # Request threads append concurrently; iterating a deque while it changes raises
+        with self._lock:
+            entries = list(self._entries)
+        return entries[::-1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info["slow_query_start"] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("slow_query_start", None)
+        if started is None or not self._entries.maxlen:
+            return
+        duration = time.perf_counter() - started
+        if duration < self.threshold or not conn.get_execution_options().get("slow_query_log", True):
+            return
+
+        route = None
+        if has_request_context():
+            route = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+        normalized = normalize_sql(statement)
+        entry = {
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "sql": normalized,
+            "parameters": parameter_shapes(parameters[0] if executemany and parameters else parameters),
+            "executemany": executemany,
+            "route": route,
+            "plan": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning("Slow query (%.1f ms) on %s: %s", entry["duration_ms"], route or "-", normalized)
+
+        if self.explain and conn.dialect.name == "postgresql" and self._should_explain(normalized):
+            if executemany:
+                parameters = parameters[0] if parameters else None
+            self._submit(conn.engine, statement, parameters, entry)
+
+    def _should_explain(self, normalized):
+        now = time.monotonic()
+        with self._lock:
+            if self._explained_at.get(normalized, float("-inf")) > now - self.explain_interval:
+                return False
+            if len(self._explained_at) > 1000:
+                self._explained_at = {k: v for k, v in self._explained_at.items() if v > now - self.explain_interval}
+            self._explained_at[normalized] = now
+        return normalized.upper().startswith(_EXPLAINABLE)
+
+    def _submit(self, engine, statement, parameters, entry):
+        # Never queue more than a handful of plans; under a flood of slow queries drop the extras
+        if not self._slots.acquire(blocking=False):
+            entry["plan"] = "skipped: too many plans pending"
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        future = self._executor.submit(self._capture_plan, engine, statement, parameters, entry)
+        future.add_done_callback(lambda f: self._slots.release())
+
+    def _capture_plan(self, engine, statement, parameters, entry):
+        upper = statement.lstrip().upper()
+        read_only = (upper.startswith(("SELECT", "WITH"))
+                     and not _WRITES.search(upper) and not _ROW_LOCKS.search(upper))
+        explain = "EXPLAIN (ANALYZE, BUFFERS)" if read_only else "EXPLAIN"
+        try:
+            with engine.connect() as connection:
+                connection = connection.execution_options(slow_query_log=False)
+                connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}")
+                rows = connection.exec_driver_sql(f"{explain} {statement}", parameters).scalars()
+                entry["plan"] = "\n".join(rows)
+                connection.rollback()
+        except Exception as ex:
+            entry["plan"] = f"unavailable: {str(ex).splitlines()[0]}"
+
+
+slow_query_log = SlowQueryLog()
@@ -1,30 +1,48 @@
+import time
 from functools import wraps
 
-from flask import request
+from flask import g, request
+from marshmallow import ValidationError
 from werkzeug.exceptions import BadRequest, Forbidden
 
 from managers.auth import auth
+from services.metrics import request_metrics
 
+_schemas = {}
 
-def validate_schema(schema_name):
+
+def validate_schema(schema_name, location="json"):
+    """Load the request payload (JSON body or query string) once and pass the result to the handler.
+
+    The loaded data is also kept on ``g.validated_data``.
+    """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            schema = schema_name()
-            errors = schema.validate(request.get_json())
-            if errors:
-                raise BadRequest(f"Invalid fields {errors}")
-            return f(*args, **kwargs)
+            schema = _schemas.get(schema_name)
+            if schema is None:
+                schema = _schemas[schema_name] = schema_name()
+            payload = request.args if location == "args" else request.get_json()
+            start = time.perf_counter()
+            try:
+                data = schema.load(payload)
+            except ValidationError as ex:
+                raise BadRequest(f"Invalid fields {ex.messages}")
+            finally:
+                request_metrics.add("validation", time.perf_counter() - start)
+            g.validated_data = data
+            return f(*args, data, **kwargs)
         return decorated_function
     return decorator
 
 
-def permission_required(required_role):
+def permission_required(*required_roles, using=auth):
+    """Allow only ``required_roles``; ``using`` is the HTTPTokenAuth instance that authenticated the route."""
     def decorator(func):
         @wraps(func)
         def decorated_func(*args, **kwargs):
-            current_user = auth.current_user()
-            if current_user.role != required_role:
+            current_user = using.current_user()
+            if current_user.role not in required_roles:
                 raise Forbidden("You do not have permission to access this resource.")
             return func(*args, **kwargs)
         return decorated_func
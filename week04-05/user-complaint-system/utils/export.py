@@ -0,0 +1,31 @@
+import csv
+import io
+import json
+
+
+def ndjson_chunks(rows, serializer, chunk_size=500):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(serializer.dump(row)))
+        if len(lines) >= chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def csv_chunks(rows, serializer, chunk_size=500):
+    buffer = io.StringIO()
+    writer = None
+    for count, row in enumerate(rows, start=1):
+        data = serializer.dump(row)
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(data))
+            writer.writeheader()
+        writer.writerow(data)
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()